@@ -0,0 +1,265 @@
+"""
+Benchmarks of every stage of the pattern -> graph -> analysis chain.
+
+Each case is run over a grid of N, s and weight skews; wall time (best of
+``--repeat`` runs) and peak traced memory (one extra run under tracemalloc)
+are recorded, plus the log-log slope of wall time against N per stage.
+Results can be stored as a baseline and later runs compared against it,
+flagging cases slower or larger than ``--threshold``.
+
+Usage (from the repository root):
+    python benchmarks/bench.py                      # run and compare
+    python benchmarks/bench.py --save-baseline      # store the current numbers
+    python benchmarks/bench.py --filter simulate --repeat 5
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+import numpy as np
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'baseline.json'
+
+# Per-agent weight profiles for the weighted cases
+SKEWS: Dict[str, Callable[[int], List[int]]] = {
+    'uniform': lambda N: [1] * N,
+    'linear': lambda N: [1 + (i % 3) for i in range(N)],
+    'heavy': lambda N: [3] + [1] * (N - 1),
+}
+
+
+# ----------------------------------------------------------------------
+# Cases: each yields (params, prepared callable)
+# ----------------------------------------------------------------------
+def _pattern_generator(quick: bool) -> Iterator[Tuple[Dict, Callable]]:
+    from patterns.alternations import PatternGenerator
+    for N in ((8, 32) if quick else (8, 32, 128, 512)):
+        for s in sorted({2, N // 4}):
+            gen = PatternGenerator(N, s, num_patterns=20, permute_columns=True,
+                                   rng=np.random.default_rng(0))
+            yield {'N': N, 's': s}, gen.generate_many
+
+
+def _weighted_pattern_generator(quick: bool) -> Iterator[Tuple[Dict, Callable]]:
+    from patterns.weighted_alternations import WeightedPatternGenerator
+    for N in ((6, 12) if quick else (6, 12, 24)):
+        for skew, weights in SKEWS.items():
+            procs = dict(enumerate(weights(N)))
+            gen = WeightedPatternGenerator(procs, 2, num_patterns=1, rng=np.random.default_rng(0))
+            yield {'N': N, 's': 2, 'skew': skew}, gen.generate
+
+
+def _strategy_graph_builder(quick: bool) -> Iterator[Tuple[Dict, Callable]]:
+    from patterns.alternations import PatternGenerator
+    from graphs.graph_creator import StrategyGraphBuilder
+    for N in ((6,) if quick else (6, 8, 10)):
+        for s in (2, 3):
+            patterns = PatternGenerator(N, s, num_patterns=3, permute_columns=True,
+                                        rng=np.random.default_rng(0)).generate_many()
+
+            def fn(patterns=patterns):
+                builder = StrategyGraphBuilder(np.random.default_rng(1), patterns=patterns)
+                return builder.build_graphs(save=False)
+            yield {'N': N, 's': s}, fn
+
+
+def _graph_creator(quick: bool) -> Iterator[Tuple[Dict, Callable]]:
+    from graphs.best_graph_creator import GraphCreator
+    for N in ((100, 1000) if quick else (100, 1000, 3000)):
+        for s in (N // 2, 7):
+            def fn(N=N, s=s):
+                creator = GraphCreator(N, s)
+                creator.build_graph()
+                return creator.to_structure()
+            yield {'N': N, 's': s}, fn
+
+
+def _graph(N: int, s: int, skew: str = 'uniform') -> list:
+    from graphs.fast_graph import get_graph
+    return get_graph(N, s, weights=SKEWS[skew](N), use_disk=False)
+
+
+def _cycle_analyzer(quick: bool) -> Iterator[Tuple[Dict, Callable]]:
+    from graphs.cycle_analyzer import CycleAnalyzer
+    for N in ((10, 100) if quick else (10, 100, 500)):
+        for s in (N // 2, 3):
+            struct = _graph(N, s)
+
+            def fn(N=N, s=s, struct=struct):
+                graphs = [{k: dict(v) if isinstance(v, dict) else v for k, v in g.items()}
+                          for g in struct]
+                return CycleAnalyzer(N, s, struct=graphs, verbose=False).process(save=False)
+            yield {'N': N, 's': s}, fn
+
+
+def _entropy(quick: bool) -> Iterator[Tuple[Dict, Callable]]:
+    from analysis.av_entropy import EntropyAnalyzer
+    for N in ((10, 100) if quick else (10, 100, 1000)):
+        for s in (N // 2, 3):
+            struct = _graph(N, s)
+
+            def fn(N=N, s=s, struct=struct):
+                return EntropyAnalyzer().compute_entropy_info(N, s, struct=struct)
+            yield {'N': N, 's': s}, fn
+
+
+def _simulate(quick: bool) -> Iterator[Tuple[Dict, Callable]]:
+    from analysis.simulation import simulate
+    for N in ((10, 100) if quick else (10, 100, 1000)):
+        for skew in ('uniform', 'linear'):
+            s = max(1, N // 4)
+            data = _graph(N, s, skew)
+
+            def fn(N=N, s=s, data=data):
+                return simulate(N, s, 0, 200, down_times=[10], down_lapses=[3],
+                                down_agents=['0'], data=data)
+            yield {'N': N, 's': s, 'skew': skew}, fn
+
+
+CASES: Dict[str, Callable[[bool], Iterator[Tuple[Dict, Callable]]]] = {
+    'PatternGenerator.generate_many': _pattern_generator,
+    'WeightedPatternGenerator.generate': _weighted_pattern_generator,
+    'StrategyGraphBuilder.build_graphs': _strategy_graph_builder,
+    'GraphCreator.build_graph': _graph_creator,
+    'CycleAnalyzer.process': _cycle_analyzer,
+    'EntropyAnalyzer.compute_entropy_info': _entropy,
+    'simulate': _simulate,
+}
+
+
+# ----------------------------------------------------------------------
+# Measurement
+# ----------------------------------------------------------------------
+def case_id(stage: str, params: Dict) -> str:
+    return stage + '[' + ','.join(f"{k}={v}" for k, v in params.items()) + ']'
+
+
+def measure(fn: Callable, repeat: int) -> Dict[str, float]:
+    """
+    Best wall time over ``repeat`` runs and peak traced memory of one run,
+    after an untimed warm-up run (lazy imports, caches).
+    """
+    fn()
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'wall': min(times), 'peak_kb': peak / 1024}
+
+
+def run(stages: List[str], repeat: int, quick: bool) -> Dict[str, Dict]:
+    results = {}
+    for stage in stages:
+        for params, fn in CASES[stage](quick):
+            cid = case_id(stage, params)
+            try:
+                results[cid] = {'stage': stage, 'params': params, **measure(fn, repeat)}
+                r = results[cid]
+                print(f"{cid:<70} {r['wall'] * 1e3:10.2f} ms {r['peak_kb']:10.0f} KiB")
+            except Exception as exc:
+                results[cid] = {'stage': stage, 'params': params, 'error': repr(exc)}
+                print(f"{cid:<70} error: {exc!r}")
+    return results
+
+
+def scaling(results: Dict[str, Dict]) -> Dict[str, float]:
+    """Log-log slope of wall time against N for each stage (all other params pooled)."""
+    exponents = {}
+    for stage in CASES:
+        pts = [(r['params']['N'], r['wall']) for r in results.values()
+               if r['stage'] == stage and 'wall' in r and r['wall'] > 0]
+        if len({n for n, _ in pts}) >= 2:
+            x = np.log([n for n, _ in pts])
+            y = np.log([w for _, w in pts])
+            exponents[stage] = float(np.polyfit(x, y, 1)[0])
+    return exponents
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """
+    Cases whose wall time or peak memory grew more than ``threshold``
+    (relative), and cases with a baseline timing that now fail.
+    """
+    regressions = []
+    for cid, r in results.items():
+        base = baseline.get(cid)
+        if base is None or 'wall' not in base:
+            continue
+        if 'wall' not in r:
+            regressions.append(f"{cid}: now fails with {r.get('error', 'no timing')}")
+            continue
+        for metric in ('wall', 'peak_kb'):
+            if base[metric] > 0 and r[metric] > base[metric] * (1 + threshold):
+                regressions.append(f"{cid} {metric}: {base[metric]:.4g} -> {r[metric]:.4g} "
+                                   f"(+{100 * (r[metric] / base[metric] - 1):.0f}%)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filter', default='',
+                        help="Only run stages whose name contains this string")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case (best is kept)")
+    parser.add_argument('--quick', action='store_true', help="Smaller grid")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Relative increase flagged as a regression (default 0.25)")
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Store the results as the new baseline")
+    parser.add_argument('--output', type=Path, default=None,
+                        help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    stages = [s for s in CASES if args.filter in s]
+    results = run(stages, args.repeat, args.quick)
+
+    print("\nScaling exponents (wall ~ N^k):")
+    for stage, k in scaling(results).items():
+        print(f"  {stage:<45} k = {k:.2f}")
+
+    report = {'python': platform.python_version(), 'machine': platform.machine(),
+              'results': results}
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        # Keep the cases not run this time
+        stored = json.loads(args.baseline.read_text())['results'] if args.baseline.exists() else {}
+        stored.update(results)
+        report['results'] = stored
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print("\nNo baseline to compare with (run with --save-baseline).")
+        return 0
+    regressions = compare(results, json.loads(args.baseline.read_text())['results'], args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {100 * args.threshold:.0f}%:")
+        for line in regressions:
+            print("  " + line)
+        return 1
+    print(f"\nNo regressions beyond {100 * args.threshold:.0f}%.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,6 +13,9 @@ class EntropyAnalyzer:
     This class provides methods to calculate probability distributions, entropy values,
     and average entropy information from graph structure data stored in JSON files.
     """
+
+    # Bump when a change alters the computed metrics (invalidates cached artifacts)
+    VERSION = 1
     
     def __init__(self):
         """
@@ -111,7 +114,8 @@ class EntropyAnalyzer:
         Returns:
             Average input information per node
         """
-        total_info = sum(len(node_data['neigh']) for node_data in pattern_data.values())
+        total_info = sum(len(node_data['neigh']) for node_data in pattern_data.values()
+                         if isinstance(node_data, dict))
         return total_info / n
     
     def calculate_average_entropy_per_node(self, pattern_data: dict, n: int) -> float:
@@ -128,10 +132,12 @@ class EntropyAnalyzer:
         total_entropy = sum(
             EntropyAnalyzer.calculate_entropy(node_data['input freq']) 
             for node_data in pattern_data.values()
+            if isinstance(node_data, dict)
         )
         return total_entropy / n
     
-    def compute_entropy_info(self, n: int, s: int, verbose: bool = False) -> Tuple[List[float], List[float]]:
+    def compute_entropy_info(self, n: int, s: int, verbose: bool = False,
+                             struct: Optional[list] = None) -> Tuple[List[float], List[float]]:
         """
         Calculate average entropy and information for all patterns in the dataset.
         
@@ -139,6 +145,8 @@ class EntropyAnalyzer:
             n: Number of nodes
             s: Parameter s
             verbose: If True, print intermediate results
+            struct: Optional preloaded graph structure (e.g. from
+                ``graphs.fast_graph.get_graph``). If None, it is read from disk.
             
         Returns:
             Tuple containing:
@@ -149,7 +157,8 @@ class EntropyAnalyzer:
             FileNotFoundError: If the graph data file doesn't exist
             ValueError: If the data contains invalid values
         """
-        struct = self._load_graph_data(n, s)
+        if struct is None:
+            struct = self._load_graph_data(n, s)
         
         info_averages = []
         entropy_averages = []
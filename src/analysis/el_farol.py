@@ -0,0 +1,206 @@
+import numpy as np
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+
+class ElFarol:
+    """
+    Batched El Farol bar-attendance dynamics (``notebooks/ciclos_farol.ipynb``).
+
+    Each round, person 0 decides from the previous attendance: stay home if it
+    exceeded the capacity ``B``, go if it was below, and otherwise copy person
+    1; everybody else copies their right neighbour, and the last person copies
+    person 0. Everybody but person 0 therefore just shifts a ring, and the
+    whole trajectory of a replica is the sequence ``e`` of person-0 decisions
+    (preceded by the initial states): ``x[k, 0] = e[k]`` and ``x[k, i] =
+    e[k - N + i]`` for ``i >= 1``. The engine only advances ``e`` and a running
+    attendance, O(replicas) per round; states, attendance and inequality are
+    derived with vectorized reductions (``states`` is a strided view).
+
+    All replicas of an instance share ``N`` and ``R``; the capacity and the
+    initial condition can differ per replica. Use ``run_farol`` for several N.
+
+    Example:
+        >>> farol = ElFarol(N=10, B=3, R=100, seeds=range(1000)).run()
+        >>> farol.inequality()[:, -1].mean()
+    """
+
+    def __init__(self, N: int, B: Union[int, Sequence[int]], R: int,
+                 seeds: Optional[Iterable[int]] = None,
+                 init: Optional[np.ndarray] = None,
+                 num_patterns: int = 1,
+                 rng: Optional[np.random.Generator] = None) -> None:
+        """
+        Initialize the replicas.
+
+        Args:
+            N: Number of people (>= 2)
+            B: Bar capacity, scalar or one value per replica
+            R: Number of rounds (including the initial one)
+            seeds: One seed per replica for its random initial condition
+            init: Initial conditions of shape (replicas, N), instead of seeds
+            num_patterns: Number of patterns ``generate`` yields in a ``Pipeline``
+            rng: Random generator used by ``Pipeline`` for the strategy search
+        """
+        if N < 2:
+            raise ValueError("`N` must be at least 2.")
+        if R < 1:
+            raise ValueError("`R` must be a positive integer.")
+        if init is None:
+            seeds = [None] if seeds is None else list(seeds)
+            init = np.stack([np.random.default_rng(seed).integers(0, 2, size=N) for seed in seeds])
+        init = np.atleast_2d(np.asarray(init, dtype=np.uint8))
+        if init.shape[1] != N:
+            raise ValueError(f"Initial conditions must have {N} columns.")
+        self.N = N
+        self.R = R
+        self.num_replicas = init.shape[0]
+        self.B = np.broadcast_to(np.asarray(B, dtype=np.int64), (self.num_replicas,)).copy()
+        self.init = init
+        self.num_patterns = num_patterns
+        self.rng = rng or np.random.default_rng()
+        self.e: Optional[np.ndarray] = None
+        self._next = 0
+
+    # ------------------------------------------------------------------
+    # Dynamics
+    # ------------------------------------------------------------------
+    def run(self) -> 'ElFarol':
+        """Advance all replicas for ``R - 1`` rounds."""
+        N, R = self.N, self.R
+        # e[:, j] is e_{j - N + 1}: initial x[0, 1:], then x[0, 0], then decisions
+        e = np.zeros((self.num_replicas, R + N - 1), dtype=np.uint8)
+        e[:, :N - 1] = self.init[:, 1:]
+        e[:, N - 1] = self.init[:, 0]
+        att = self.init.sum(axis=1, dtype=np.int64)
+        for k in range(1, R):
+            j = k + N - 1
+            leaving = e[:, j - N]  # x[k-1, 1]
+            d = np.where(att > self.B, 0, np.where(att < self.B, 1, leaving)).astype(np.uint8)
+            e[:, j] = d
+            att += d.astype(np.int64) - leaving
+        self.e = e
+        return self
+
+    def _require_run(self) -> np.ndarray:
+        if self.e is None:
+            self.run()
+        return self.e
+
+    @property
+    def states(self) -> np.ndarray:
+        """Read-only view of shape (replicas, R, N) with ``x[k, i]``."""
+        e = self._require_run()
+        windows = np.lib.stride_tricks.sliding_window_view(e, self.N, axis=1)
+        # windows[:, k, j] = e_{k - N + 1 + j}: column 0 is the last entry
+        order = np.r_[self.N - 1, np.arange(self.N - 1)]
+        return windows[:, :, order]
+
+    def attendance(self) -> np.ndarray:
+        """Attendance per round, shape (replicas, R)."""
+        e = self._require_run().astype(np.int64)
+        c = np.concatenate([np.zeros((e.shape[0], 1), dtype=np.int64), np.cumsum(e, axis=1)], axis=1)
+        return c[:, self.N:] - c[:, :-self.N]
+
+    def cumulative(self, rounds: Optional[slice] = None) -> np.ndarray:
+        """Cumulative attendance per person, ``x.cumsum(axis=1)``, for the given rounds."""
+        return np.cumsum(self.states, axis=1, dtype=np.int64)[:, rounds or slice(None)]
+
+    def inequality(self, chunk_size: int = 1 << 22) -> np.ndarray:
+        """
+        Inequality per round, ``(max_i - min_i cumulative attendance) / (k + 1)``
+        as in the notebook, shape (replicas, R).
+
+        The cumulative attendance of column ``j`` of the window at round ``k``
+        is ``P[k + j + 1] - P[j]`` with ``P`` the prefix sums of ``e``, so it is
+        computed in chunks of rounds without materializing the (R, N) array.
+        """
+        e = self._require_run().astype(np.int64)
+        P = np.concatenate([np.zeros((e.shape[0], 1), dtype=np.int64), np.cumsum(e, axis=1)], axis=1)
+        N, R = self.N, self.R
+        ineq = np.zeros((self.num_replicas, R))
+        step = max(1, chunk_size // (N * self.num_replicas))
+        cols = np.arange(N)
+        for k0 in range(0, R, step):
+            k = np.arange(k0, min(R, k0 + step))
+            C = P[:, k[:, None] + cols[None, :] + 1] - P[:, cols][:, None, :]
+            ineq[:, k] = (C.max(axis=2) - C.min(axis=2)) / (k + 1)
+        return ineq
+
+    # ------------------------------------------------------------------
+    # Periodicity and patterns
+    # ------------------------------------------------------------------
+    def period(self, r: int = 0, max_period: Optional[int] = None) -> int:
+        """
+        Period of replica ``r`` at the end of the run (0 if not periodic yet).
+        The state at round ``k`` is the window ``e[k - N + 1 .. k]``, so the
+        trajectory has period ``p`` once the last ``N + p`` decisions repeat.
+        """
+        e = self._require_run()[r]
+        N = self.N
+        max_period = max_period or len(e) - N
+        for p in range(1, max_period + 1):
+            if len(e) < N + p:
+                break
+            if np.array_equal(e[-N:], e[-N - p:-p]):
+                return p
+        return 0
+
+    def to_pattern(self, r: int = 0) -> Dict[str, List[str]]:
+        """
+        Last period of replica ``r`` in the column-centric pattern format of
+        ``PatternGenerator`` (``{'<i>a': ['0'/'1' per row]}``).
+        """
+        p = self.period(r)
+        if p == 0:
+            raise ValueError(f"Replica {r} has not reached a periodic state in {self.R} rounds.")
+        rows = np.asarray(self.states[r, -p:])
+        return {f"{i}a": [str(v) for v in rows[:, i]] for i in range(self.N)}
+
+    def generate(self) -> Dict[str, List[str]]:
+        """
+        Next periodic replica as a pattern, so an ``ElFarol`` instance can be
+        used as the generator of ``pipeline.Pipeline``.
+        """
+        self._require_run()
+        while self._next < self.num_replicas:
+            r = self._next
+            self._next += 1
+            if self.period(r) > 0:
+                return self.to_pattern(r)
+        raise RuntimeError("No more periodic replicas.")
+
+    def generate_many(self) -> List[Dict[str, List[str]]]:
+        return [self.generate() for _ in range(self.num_patterns)]
+
+    def summary(self) -> Dict[str, np.ndarray]:
+        """Final attendance, mean attendance, final inequality and period of every replica."""
+        att = self.attendance()
+        return {
+            'B': self.B,
+            'final_attendance': att[:, -1],
+            'mean_attendance': att.mean(axis=1),
+            'final_inequality': self.inequality()[:, -1],
+            'period': np.array([self.period(r) for r in range(self.num_replicas)]),
+        }
+
+
+def run_farol(configs: Iterable[Tuple[int, int, int]], R: int) -> Dict[Tuple[int, int, int], Dict[str, object]]:
+    """
+    Run El Farol for many ``(N, B, seed)`` configurations, batching all
+    configurations with the same ``N`` into one ``ElFarol`` instance.
+
+    Returns:
+        Mapping from each configuration to its final attendance, mean
+        attendance, final inequality and period
+    """
+    by_N: Dict[int, List[Tuple[int, int, int]]] = {}
+    for cfg in configs:
+        by_N.setdefault(cfg[0], []).append(cfg)
+    results = {}
+    for N, group in by_N.items():
+        farol = ElFarol(N, [b for _, b, _ in group], R, seeds=[seed for _, _, seed in group]).run()
+        summary = farol.summary()
+        for r, cfg in enumerate(group):
+            results[cfg] = {key: value[r].item() for key, value in summary.items() if key != 'B'}
+    return results
@@ -0,0 +1,295 @@
+import numpy as np
+
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence
+
+from analysis.simulation import group_by_agent
+
+
+# Sampler of positive integer durations: (rng, shape) -> int array
+Sampler = Callable[[np.random.Generator, tuple], np.ndarray]
+
+
+def geometric(mean: float) -> Sampler:
+    """Sampler of geometric durations (>= 1) with the given mean."""
+    if mean < 1:
+        raise ValueError("`mean` must be >= 1.")
+    return lambda rng, shape: rng.geometric(1.0 / mean, size=shape)
+
+
+def fixed(value: int) -> Sampler:
+    """Sampler that always returns *value*."""
+    return lambda rng, shape: np.full(shape, value, dtype=np.int64)
+
+
+class FailureSchedule:
+    """
+    Failure scenario for ``simulate`` compiled into per-step event arrays.
+
+    A scenario is a set of down intervals ``[start, stop)`` per agent (agent
+    positions as in ``simulate``'s agent list). Overlapping or touching
+    intervals of an agent are merged. The intervals are compiled into two
+    CSR-like event tables, so ``simulate`` looks up the agents going down and
+    coming back online at a step in O(1) instead of scanning every failure.
+    Following ``simulate``'s semantics, an agent is down during
+    ``[start, stop)`` and ``back_online`` is called at ``stop``; a zero-length
+    interval only switches the agent to correcting mode.
+    """
+
+    def __init__(self, num_agents: int, Nsteps: int,
+                 agents: Sequence[int] = (), starts: Sequence[int] = (),
+                 stops: Sequence[int] = ()) -> None:
+        """
+        Initialize the schedule from interval arrays.
+
+        Args:
+            num_agents: Number of agents
+            Nsteps: Number of simulation steps; later events are dropped
+            agents, starts, stops: Down intervals ``[start, stop)`` of each agent
+        """
+        self.num_agents = num_agents
+        self.Nsteps = Nsteps
+        self.agents, self.starts, self.stops = self._merge(
+            np.asarray(agents, dtype=np.int64), np.asarray(starts, dtype=np.int64),
+            np.asarray(stops, dtype=np.int64))
+        self._compile()
+
+    # ------------------------------------------------------------------
+    # Construction helpers
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _merge(agents: np.ndarray, starts: np.ndarray, stops: np.ndarray):
+        """Merge overlapping or touching intervals of each agent."""
+        if len(agents) == 0:
+            return agents, starts, stops
+        order = np.lexsort((starts, agents))
+        agents, starts, stops = agents[order], starts[order], stops[order]
+        # Running max of stops within each agent, to detect overlaps
+        new_agent = np.r_[True, agents[1:] != agents[:-1]]
+        first = np.flatnonzero(new_agent)
+        run_stop = stops.copy()
+        for g_start, g_stop in zip(first, np.r_[first[1:], len(agents)]):
+            run_stop[g_start:g_stop] = np.maximum.accumulate(stops[g_start:g_stop])
+        new_interval = new_agent.copy()
+        new_interval[1:] |= starts[1:] > run_stop[:-1]
+        idx = np.flatnonzero(new_interval)
+        ends = np.r_[idx[1:], len(agents)] - 1
+        return agents[idx], starts[idx], run_stop[ends]
+
+    def _compile(self) -> None:
+        """Build the per-step event tables."""
+        def table(steps: np.ndarray, agents: np.ndarray):
+            keep = (steps >= 0) & (steps < self.Nsteps)
+            steps, agents = steps[keep], agents[keep]
+            order = np.argsort(steps, kind='stable')
+            ptr = np.zeros(self.Nsteps + 1, dtype=np.int64)
+            np.add.at(ptr, steps + 1, 1)
+            return np.cumsum(ptr), agents[order]
+
+        self._down_ptr, self._down = table(self.starts, self.agents)
+        self._up_ptr, self._up = table(self.stops, self.agents)
+
+    @classmethod
+    def from_lists(cls, num_agents: int, Nsteps: int, down_times: List[int],
+                   down_lapses: List[int], down_agents: List[str]) -> 'FailureSchedule':
+        """
+        Build a schedule from ``simulate``'s parallel failure lists, with the
+        same effect as ``simulate``'s own handling of them.
+
+        ``simulate`` applies the entries in list order at every step and calls
+        ``back_online`` at the end of each entry, so an entry that ends while
+        another one of the same agent is still running brings the agent back
+        online. The entries are replayed in that order and turned into the
+        resulting down intervals; an end that finds the agent already online
+        becomes a zero-length interval (correcting mode only).
+        """
+        events = []
+        for i, (t, lapse, a) in enumerate(zip(down_times, down_lapses, down_agents)):
+            events.append((int(t), i, 0, int(a)))
+            events.append((int(t) + int(lapse), i, 1, int(a)))
+        events.sort()
+
+        agents, starts, stops = [], [], []
+        down_since: Dict[int, int] = {}
+        k = 0
+        while k < len(events):
+            step = events[k][0]
+            # Final state of every agent touched at this step, and whether it came up
+            final: Dict[int, bool] = {}
+            while k < len(events) and events[k][0] == step:
+                _, _, up, a = events[k]
+                final[a] = not up
+                k += 1
+            for a, is_down in final.items():
+                if is_down and a not in down_since:
+                    down_since[a] = step
+                elif not is_down:
+                    start = down_since.pop(a, step)
+                    agents.append(a)
+                    starts.append(start)
+                    stops.append(step)
+        return cls(num_agents, Nsteps, agents, starts, stops)
+
+    @classmethod
+    def renewal(cls, num_agents: int, Nsteps: int, up_time: Sampler, down_time: Sampler,
+                rng: Optional[np.random.Generator] = None,
+                agents: Optional[Sequence[int]] = None) -> 'FailureSchedule':
+        """
+        Independent alternating renewal process per agent: each agent works
+        for ``up_time`` steps, is down for ``down_time`` steps, and so on.
+
+        Args:
+            num_agents: Number of agents
+            Nsteps: Number of simulation steps
+            up_time: Sampler of the working periods
+            down_time: Sampler of the down periods
+            rng: Random generator (default ``np.random.default_rng()``)
+            agents: Agents subject to failures (default: all)
+        """
+        rng = rng or np.random.default_rng()
+        agents = np.arange(num_agents) if agents is None else np.asarray(agents)
+        all_a, all_s, all_e = [], [], []
+        # Draw blocks of cycles until every agent's process passes Nsteps
+        offset = np.zeros(len(agents), dtype=np.int64)
+        pending = np.ones(len(agents), dtype=bool)
+        block = 16
+        while pending.any():
+            rows = np.flatnonzero(pending)
+            up = up_time(rng, (len(rows), block)).astype(np.int64)
+            down = down_time(rng, (len(rows), block)).astype(np.int64)
+            period_end = offset[rows, None] + np.cumsum(up + down, axis=1)
+            starts = period_end - down
+            keep = starts < Nsteps
+            all_a.append(np.broadcast_to(agents[rows, None], keep.shape)[keep])
+            all_s.append(starts[keep])
+            all_e.append(period_end[keep])
+            offset[rows] = period_end[:, -1]
+            pending[rows] = period_end[:, -1] < Nsteps
+            block *= 2
+        return cls(num_agents, Nsteps, np.concatenate(all_a), np.concatenate(all_s),
+                   np.concatenate(all_e))
+
+    @classmethod
+    def poisson(cls, num_agents: int, Nsteps: int, rate: float, mean_lapse: float,
+                rng: Optional[np.random.Generator] = None,
+                agents: Optional[Sequence[int]] = None) -> 'FailureSchedule':
+        """
+        Failures as a (discrete-time) Poisson process of ``rate`` failures
+        per step and agent, with geometric down times of mean ``mean_lapse``.
+        """
+        return cls.renewal(num_agents, Nsteps, geometric(1.0 / rate), geometric(mean_lapse),
+                           rng=rng, agents=agents)
+
+    @classmethod
+    def group_failures(cls, num_agents: int, Nsteps: int, groups: List[List[int]],
+                       rate: float, down_time: Sampler, p_member: float = 1.0,
+                       rng: Optional[np.random.Generator] = None) -> 'FailureSchedule':
+        """
+        Correlated failures: each group fails as a Poisson process of ``rate``
+        events per step, and every member goes down with probability
+        ``p_member`` for the event's (shared) down time.
+        """
+        rng = rng or np.random.default_rng()
+        all_a, all_s, all_e = [], [], []
+        for group in groups:
+            group = np.asarray(group)
+            num_events = rng.poisson(rate * Nsteps)
+            starts = np.sort(rng.integers(0, Nsteps, size=num_events))
+            stops = starts + down_time(rng, (num_events,)).astype(np.int64)
+            hit = rng.random((num_events, len(group))) < p_member
+            ev, member = np.nonzero(hit)
+            all_a.append(group[member])
+            all_s.append(starts[ev])
+            all_e.append(stops[ev])
+        if not all_a:
+            return cls(num_agents, Nsteps)
+        return cls(num_agents, Nsteps, np.concatenate(all_a), np.concatenate(all_s),
+                   np.concatenate(all_e))
+
+    @classmethod
+    def worst_k(cls, pattern_data: dict, k: int, Nsteps: int, start: int = 0,
+                lapse: int = 1) -> 'FailureSchedule':
+        """
+        Adversarial scenario: the ``k`` agents chosen by ``worst_k_agents``
+        go down together at ``start`` for ``lapse`` steps.
+        """
+        agents = worst_k_agents(pattern_data, k)
+        n = len(group_by_agent(pattern_data))
+        return cls(n, Nsteps, agents, [start] * len(agents), [start + lapse] * len(agents))
+
+    def __add__(self, other: 'FailureSchedule') -> 'FailureSchedule':
+        """Superpose two scenarios."""
+        return FailureSchedule(max(self.num_agents, other.num_agents), max(self.Nsteps, other.Nsteps),
+                               np.r_[self.agents, other.agents], np.r_[self.starts, other.starts],
+                               np.r_[self.stops, other.stops])
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def going_down(self, step: int) -> np.ndarray:
+        """Agents whose down interval starts at *step* (none past ``Nsteps``)."""
+        if not 0 <= step < self.Nsteps:
+            return self._down[:0]
+        return self._down[self._down_ptr[step]:self._down_ptr[step + 1]]
+
+    def coming_up(self, step: int) -> np.ndarray:
+        """Agents that come back online at *step* (none past ``Nsteps``)."""
+        if not 0 <= step < self.Nsteps:
+            return self._up[:0]
+        return self._up[self._up_ptr[step]:self._up_ptr[step + 1]]
+
+    def to_mask(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Boolean down mask of shape (steps, num_agents) for steps ``start:stop``."""
+        stop = self.Nsteps if stop is None else stop
+        diff = np.zeros((stop - start + 1, self.num_agents), dtype=np.int32)
+        s = np.clip(self.starts - start, 0, stop - start)
+        e = np.clip(self.stops - start, 0, stop - start)
+        np.add.at(diff, (s, self.agents), 1)
+        np.add.at(diff, (e, self.agents), -1)
+        return np.cumsum(diff, axis=0)[:-1] > 0
+
+    def __len__(self) -> int:
+        return len(self.agents)
+
+    def __str__(self) -> str:
+        return (f"FailureSchedule: {len(self)} failures of {len(np.unique(self.agents))} agents "
+                f"in {self.Nsteps} steps, {int((self.stops - self.starts).sum())} agent-steps down")
+
+
+def worst_k_agents(pattern_data: dict, k: int) -> List[int]:
+    """
+    Greedy choice of the ``k`` agents whose failure disturbs the most nodes.
+
+    Each agent covers the nodes downstream of its own nodes in the dependency
+    graph (edges from a neighbor to the node that reads it); agents are
+    picked greedily to maximize the number of covered nodes.
+
+    Returns:
+        Agent positions, as used by ``simulate``
+    """
+    agent_info = group_by_agent(pattern_data)
+    readers: Dict[str, List[str]] = {}
+    for node_id, node in pattern_data.items():
+        if isinstance(node, dict):
+            for n2 in node.get('neigh') or []:
+                readers.setdefault(n2, []).append(node_id)
+
+    coverage = []
+    for a in agent_info:
+        seen = set(agent_info[a])
+        queue = deque(seen)
+        while queue:
+            for r in readers.get(queue.popleft(), []):
+                if r not in seen:
+                    seen.add(r)
+                    queue.append(r)
+        coverage.append(seen)
+
+    chosen: List[int] = []
+    covered = set()
+    for _ in range(min(k, len(coverage))):
+        best = max((a for a in range(len(coverage)) if a not in chosen),
+                   key=lambda a: len(coverage[a] - covered))
+        chosen.append(best)
+        covered |= coverage[best]
+    return chosen
@@ -0,0 +1,311 @@
+import numpy as np
+
+from typing import Dict, List, Optional, Tuple
+
+from analysis.simulation import Agent, group_by_agent, get_state, neighbor_index
+from patterns.node_ids import NodeRegistry, split_node_id
+
+
+# A chain state is (node bits, correct flags): bit k of the first integer is
+# the state of node k, bit a of the second is the `correct` flag of agent a.
+State = Tuple[int, int]
+
+
+class RecoveryAnalyzer:
+    """
+    Exact recovery statistics of the ``simulate`` dynamics via Markov chains.
+
+    The state of the system is the node states plus the ``correct`` flag of
+    every agent (``is_down`` follows the failure scenario deterministically).
+    Given the previous node states each agent acts independently, so the
+    transition kernel is the product of per-agent outcome distributions that
+    mirror ``Agent.take_action`` and ``Agent.correct_state``: random fallbacks
+    for missing inputs, randomization of down agents, and corrections with
+    probability ``random_thresh``.
+
+    The failure phase is propagated forward as a distribution. From the step
+    at which the last agent comes back online the chain is homogeneous; its
+    reachable states are enumerated and expected hitting times of the
+    periodic attractor (the rows of the stored pattern) are solved with
+    sparse linear algebra. Only practical for small and moderate N, since
+    the number of reachable states can grow as 2^(nodes + agents).
+    """
+
+    def __init__(self, data: list, idx: int = 0, random_thresh: float = 0.5) -> None:
+        """
+        Initialize the analyzer.
+
+        Args:
+            data: Graph structure as returned by ``load_graph_data`` or ``get_graph``
+            idx: Pattern index
+            random_thresh: Correction probability, as in ``simulate``
+        """
+        self.agent_info = group_by_agent(data[idx])
+        self.random_thresh = random_thresh
+        self.agents = [Agent(id=i, node_data=self.agent_info[i], random_thresh=random_thresh)
+                       for i in self.agent_info]
+        registry = NodeRegistry.from_pattern(data[idx])
+        self.node_ids = registry.node_ids
+        self.num_nodes = len(self.node_ids)
+        self.neigh, self.bit_weights = neighbor_index(self.agents, registry.index)
+        self.bounds = np.cumsum([0] + [a.weight for a in self.agents])
+        self.node_cycle = np.array([node.cycle for a in self.agents for node in a.nodes])
+        self.num_cycles = max(0, int(self.node_cycle.max()) + 1)
+        self._num_bytes = (self.num_nodes + 7) // 8
+
+        # Periodic attractor: node states of every row of the pattern
+        period = len(self.agent_info[self.agents[0].id][self.agents[0].nodes[0].id]['pattern'])
+        self.attractor = {
+            self._to_int([int(self.agent_info[a][n]['pattern'][t]) for a in self.agent_info
+                          for n in self.agent_info[a]])
+            for t in range(period)
+        }
+
+    # ------------------------------------------------------------------
+    # State helpers
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _to_int(bits: List[int]) -> int:
+        return sum(1 << k for k, b in enumerate(bits) if b)
+
+    def _to_bits(self, value: int) -> np.ndarray:
+        raw = np.frombuffer(value.to_bytes(self._num_bytes, 'little'), dtype=np.uint8)
+        return np.unpackbits(raw, bitorder='little')[:self.num_nodes].astype(np.int64)
+
+    def initial_state(self, init_cond: Optional[str] = None) -> State:
+        """Node states at step 0 as set by ``simulate`` (only 'a' nodes follow the agent state)."""
+        prev_state = init_cond if init_cond else get_state(self.agent_info, 0)
+        bits = []
+        for a, agent in enumerate(self.agents):
+            for node in agent.nodes:
+                bits.append(int(split_node_id(node.id)[1] == 0 and prev_state[int(agent.id)] != '0'))
+        return self._to_int(bits), 0
+
+    # ------------------------------------------------------------------
+    # Transition kernel
+    # ------------------------------------------------------------------
+    def _agent_outcomes(self, a: int, codes: np.ndarray, status: np.ndarray,
+                        is_down: bool, correct: bool) -> Dict[Tuple[int, bool], float]:
+        """Distribution of (node bits of agent a, new correct flag) after one step."""
+        agent = self.agents[a]
+        w = agent.weight
+        outcomes: Dict[Tuple[int, bool], float] = {}
+
+        def add(bits: Tuple[int, ...], flag: bool, p: float) -> None:
+            key = (self._to_int(list(bits)), flag)
+            outcomes[key] = outcomes.get(key, 0.0) + p
+
+        if is_down:
+            # State is randomized: one random node gets a random value
+            for nid in range(w):
+                for v in (0, 1):
+                    add(tuple(v if i == nid else 0 for i in range(w)), correct, 0.5 / w)
+            return outcomes
+
+        actions = agent.table[agent.offsets + codes]
+        free = [i for i in range(w) if actions[i] < 0]
+        for combo in range(1 << len(free)):
+            base = [int(x) for x in actions]
+            for j, i in enumerate(free):
+                base[i] = (combo >> j) & 1
+            p_base = 0.5 ** len(free)
+            for nid in range(w):
+                p = p_base / w
+                node = agent.nodes[nid]
+                if node.cycle < 0 or not correct:
+                    add(tuple(base), correct, p)
+                    continue
+                diff = status[node.cycle] - node.ones_in_cycle
+                if diff == 0:
+                    add(tuple(base), False, p)
+                elif (diff < 0 and sum(base) == 0) or (diff > 0 and sum(base) == 1):
+                    fixed = tuple(1 if (diff < 0 and i == nid) else 0 for i in range(w))
+                    add(fixed, True, p * self.random_thresh)
+                    add(tuple(base), True, p * (1 - self.random_thresh))
+                else:
+                    add(tuple(base), True, p)
+        return outcomes
+
+    def transitions(self, state: State, down: int = 0) -> Dict[State, float]:
+        """
+        One-step distribution from *state*.
+
+        Args:
+            state: Current (node bits, correct flags)
+            down: Bit mask of the agents that are down during this step
+        """
+        node_value, flags = state
+        bits = self._to_bits(node_value)
+        codes = (bits[self.neigh] * self.bit_weights).sum(axis=1)
+        status = np.bincount(self.node_cycle[(self.node_cycle >= 0) & (bits == 1)],
+                             minlength=self.num_cycles)
+
+        dist: Dict[State, float] = {(0, 0): 1.0}
+        for a in range(len(self.agents)):
+            lo, hi = self.bounds[a], self.bounds[a + 1]
+            outcomes = self._agent_outcomes(a, codes[lo:hi], status,
+                                            bool((down >> a) & 1), bool((flags >> a) & 1))
+            new_dist: Dict[State, float] = {}
+            for (nb, fl), p in dist.items():
+                for (ab, af), q in outcomes.items():
+                    key = (nb | (ab << int(lo)), fl | (int(af) << a))
+                    new_dist[key] = new_dist.get(key, 0.0) + p * q
+            dist = new_dist
+        return dist
+
+    # ------------------------------------------------------------------
+    # Failure phase
+    # ------------------------------------------------------------------
+    def scenario_distribution(self, init_cond: Optional[str] = None,
+                              down_times: Optional[List[int]] = None,
+                              down_lapses: Optional[List[int]] = None,
+                              down_agents: Optional[List[str]] = None) -> Tuple[Dict[State, float], int]:
+        """
+        Propagate the failure scenario (same arguments as ``simulate``) up to
+        the step at which the last agent is back online.
+
+        Returns:
+            Tuple of (state distribution at that step, the step itself)
+        """
+        dist = {self.initial_state(init_cond): 1.0}
+        if not down_agents:
+            return dist, 0
+        index = {agent.id: a for a, agent in enumerate(self.agents)}
+        last = max(t + l for t, l in zip(down_times, down_lapses))
+        down = 0
+        for step in range(last + 1):
+            online = 0
+            for i in range(len(down_agents)):
+                a = index[str(down_agents[i])]
+                if step == down_times[i]:
+                    down |= 1 << a
+                if step == down_times[i] + down_lapses[i]:
+                    down &= ~(1 << a)
+                    online |= 1 << a
+            if online:
+                dist = {(nb, fl | online): p for (nb, fl), p in dist.items()}
+            if step == last:
+                break
+            new_dist: Dict[State, float] = {}
+            for state, p in dist.items():
+                for nxt, q in self.transitions(state, down).items():
+                    new_dist[nxt] = new_dist.get(nxt, 0.0) + p * q
+            dist = new_dist
+        return dist, last
+
+    # ------------------------------------------------------------------
+    # Hitting times
+    # ------------------------------------------------------------------
+    def enumerate_states(self, start: List[State], max_states: int = 1_000_000) -> Tuple[List[State], Dict[State, Dict[State, float]]]:
+        """Breadth-first enumeration of the states reachable from *start* after recovery."""
+        index = {s: None for s in start}
+        order = list(start)
+        kernel: Dict[State, Dict[State, float]] = {}
+        k = 0
+        while k < len(order):
+            state = order[k]
+            k += 1
+            if state[0] in self.attractor:
+                continue
+            kernel[state] = self.transitions(state)
+            for nxt in kernel[state]:
+                if nxt not in index:
+                    if len(order) >= max_states:
+                        raise RuntimeError(f"More than {max_states} reachable states.")
+                    index[nxt] = None
+                    order.append(nxt)
+        return order, kernel
+
+    def expected_recovery_time(self, init_cond: Optional[str] = None,
+                               down_times: Optional[List[int]] = None,
+                               down_lapses: Optional[List[int]] = None,
+                               down_agents: Optional[List[str]] = None,
+                               max_states: int = 1_000_000) -> Dict[str, object]:
+        """
+        Expected number of steps until the node states reach the periodic attractor.
+
+        Args:
+            init_cond, down_times, down_lapses, down_agents: As in ``simulate``
+            max_states: Abort if more states than this are reachable
+
+        Returns:
+            Dictionary with:
+                - 'expected_steps': expected steps after the last agent is back
+                  online (``inf`` if recovery can fail)
+                - 'expected_total': same, counted from step 0 of ``simulate``
+                - 'recovery_probability': probability of ever reaching the attractor
+                - 'recovery_step': step at which the last agent is back online
+                - 'num_states': number of reachable states after recovery
+        """
+        import scipy.sparse as sp
+        from scipy.sparse.linalg import spsolve
+
+        start, last = self.scenario_distribution(init_cond, down_times, down_lapses, down_agents)
+        order, kernel = self.enumerate_states(list(start), max_states)
+        transient = [s for s in order if s[0] not in self.attractor]
+
+        # States that can reach the attractor (reverse reachability)
+        reverse: Dict[State, List[State]] = {}
+        for s, row in kernel.items():
+            for nxt in row:
+                reverse.setdefault(nxt, []).append(s)
+        can_reach = set()
+        frontier = [s for s in order if s[0] in self.attractor]
+        while frontier:
+            s = frontier.pop()
+            for prev in reverse.get(s, []):
+                if prev not in can_reach:
+                    can_reach.add(prev)
+                    frontier.append(prev)
+        # Finite expectation only where no never-recovering state is reachable
+        doomed = {s for s in transient if s not in can_reach}
+        risky = set(doomed)
+        frontier = list(doomed)
+        while frontier:
+            s = frontier.pop()
+            for prev in reverse.get(s, []):
+                if prev not in risky and prev[0] not in self.attractor:
+                    risky.add(prev)
+                    frontier.append(prev)
+
+        # Hitting probabilities on states that can reach the attractor,
+        # expected hitting times on states that reach it almost surely.
+        prob = {s: 1.0 for s in order if s[0] in self.attractor}
+        hit = {s: 0.0 for s in order if s[0] in self.attractor}
+        for name, states in (('prob', [s for s in transient if s in can_reach]),
+                             ('time', [s for s in transient if s not in risky])):
+            if not states:
+                continue
+            local = {s: k for k, s in enumerate(states)}
+            rows, cols, vals = [], [], []
+            rhs = np.zeros(len(states))
+            for s, k in local.items():
+                rows.append(k)
+                cols.append(k)
+                vals.append(1.0)
+                for nxt, p in kernel[s].items():
+                    if nxt in local:
+                        rows.append(k)
+                        cols.append(local[nxt])
+                        vals.append(-p)
+                    elif name == 'prob' and nxt[0] in self.attractor:
+                        rhs[k] += p
+                if name == 'time':
+                    rhs[k] = 1.0
+            A = sp.csr_matrix((vals, (rows, cols)), shape=(len(states), len(states)))
+            sol = np.atleast_1d(spsolve(A, rhs))
+            target = prob if name == 'prob' else hit
+            target.update({s: float(sol[local[s]]) for s in states})
+
+        recovery_probability = sum(p * prob.get(s, 0.0) for s, p in start.items())
+        if any(s not in hit for s, p in start.items() if p > 0):
+            expected = float('inf')
+        else:
+            expected = sum(p * hit[s] for s, p in start.items())
+        return {
+            'expected_steps': expected,
+            'expected_total': last + expected,
+            'recovery_probability': recovery_probability,
+            'recovery_step': last,
+            'num_states': len(order),
+        }
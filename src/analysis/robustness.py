@@ -0,0 +1,219 @@
+import json
+import os
+import tempfile
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from config.config import PATHS
+from analysis.simulation import group_by_agent, load_graph_data, simulate
+
+
+# Graph data of the worker processes, set once by the pool initializer
+_WORKER_DATA: Optional[list] = None
+
+
+def _init_worker(data: list) -> None:
+    global _WORKER_DATA
+    _WORKER_DATA = data
+
+
+def attractor_transitions(pattern_data: dict) -> set:
+    """
+    Steps of the periodic attractor as pairs of bit-packed node states
+    (``TrajectoryWriter``'s packing, ``simulate``'s node order): row ``t``
+    and row ``t + 1`` (cyclically) of the pattern.
+    """
+    agent_info = group_by_agent(pattern_data)
+    rows = np.array([[c == '1' for c in agent_info[a][nid]['pattern']]
+                     for a in agent_info for nid in agent_info[a]], dtype=np.uint8).T
+    packed = [row.tobytes() for row in np.packbits(rows, axis=1)]
+    return {(packed[t], packed[(t + 1) % len(packed)]) for t in range(len(packed))}
+
+
+def recovery_step(states: np.ndarray, transitions: set, period: int, start: int = 0) -> Optional[int]:
+    """
+    First record ``k >= start`` from which the packed node states follow the
+    attractor for a full period (``period`` consecutive ``transitions``), or
+    ``None`` if no such record leaves room for a full period.
+    """
+    rows = [row.tobytes() for row in states]
+    on_cycle = np.array([(rows[j], rows[j + 1]) in transitions for j in range(len(rows) - 1)])
+    # Records k with on_cycle[k:k + period] all True
+    runs = np.convolve(on_cycle.astype(np.int64), np.ones(period, dtype=np.int64), mode='valid')
+    hits = np.flatnonzero(runs[start:] == period)
+    return int(start + hits[0]) if len(hits) else None
+
+
+def _run_scenario(args: Tuple) -> Dict[str, object]:
+    """Simulate one failure scenario ``runs`` times and summarize the outcome."""
+    n, s, idx, agents, Nsteps, down_time, lapse, runs, seed, random_thresh = args
+    data = _WORKER_DATA
+    transitions = attractor_transitions(data[idx])
+    period = len(transitions)
+    up = down_time + lapse
+    times, deviations = [], []
+    for r in range(runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            # Node states are streamed: the returned list only holds agent states
+            states, ones_in_c = simulate(
+                n, s, idx, Nsteps,
+                down_times=[down_time] * len(agents),
+                down_lapses=[lapse] * len(agents),
+                down_agents=[str(a) for a in agents],
+                random_thresh=random_thresh,
+                seed=seed + r,
+                data=data,
+                output=tmp)
+            states, ones_in_c = np.array(states), np.array(ones_in_c)
+        target = ones_in_c[0]
+        deviations.append(int(np.abs(ones_in_c - target).max()))
+        k = recovery_step(states, transitions, period, start=up)
+        times.append(None if k is None else k - up)
+    recovered = [t for t in times if t is not None]
+    return {
+        'agents': list(agents),
+        'recovery_fraction': len(recovered) / runs,
+        'mean_recovery_time': float(np.mean(recovered)) if recovered else None,
+        'max_recovery_time': max(recovered) if recovered else None,
+        'max_deviation': max(deviations),
+    }
+
+
+def robustness_map(n: int, s: int, idx: int = 0, sufix: str = '',
+                   pairs: bool = False, Nsteps: int = 200, down_time: int = 10,
+                   lapse: int = 1, runs: int = 1, seed: int = 54,
+                   random_thresh: float = 0.5, workers: Optional[int] = None,
+                   data: Optional[list] = None) -> Dict[str, object]:
+    """
+    Simulate every single-agent failure (and optionally every pair) of a graph.
+
+    Each scenario takes the agents down at ``down_time`` for ``lapse`` steps
+    and runs ``simulate`` ``runs`` times with consecutive seeds. Scenarios are
+    spread over a process pool; the graph data is sent once per worker.
+
+    Args:
+        n, s, idx, sufix: Graph selection, as in ``simulate``
+        pairs: Also simulate every pair of agents going down together
+        Nsteps: Number of simulated steps per run
+        down_time: Step at which the agents go down
+        lapse: Number of steps the agents stay down
+        runs: Number of runs (seeds) per scenario
+        seed: Seed of the first run
+        random_thresh: As in ``simulate``
+        workers: Number of processes (default ``os.cpu_count()``; 1 runs inline)
+        data: Preloaded graph data (skips the file read)
+
+    Returns:
+        Dictionary with:
+            - 'singles' / 'pairs': one summary per scenario with the agents,
+              'recovery_fraction', 'mean_recovery_time', 'max_recovery_time'
+              (steps after the agents are back online until the node states
+              are back on the periodic pattern and follow it for a full
+              period, as in ``RecoveryAnalyzer``; runs that do not settle
+              within ``Nsteps`` count as not recovered) and 'max_deviation' (maximum
+              deviation of ``ones_in_cycle`` from its initial value)
+            - 'criticality': per-agent table, see ``criticality_table``
+    """
+    if data is None:
+        data = load_graph_data(n, s, sufix)
+    num_agents = len(group_by_agent(data[idx]))
+    scenarios = [(a,) for a in range(num_agents)]
+    if pairs:
+        scenarios += list(combinations(range(num_agents), 2))
+    tasks = [(n, s, idx, agents, Nsteps, down_time, lapse, runs, seed, random_thresh)
+             for agents in scenarios]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(data)
+        results = [_run_scenario(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(data,)) as pool:
+            results = list(pool.map(_run_scenario, tasks, chunksize=max(1, len(tasks) // (4 * workers))))
+
+    singles = results[:num_agents]
+    doubles = results[num_agents:]
+    return {
+        'singles': singles,
+        'pairs': doubles,
+        'criticality': criticality_table(num_agents, singles, doubles),
+    }
+
+
+def criticality_table(num_agents: int, singles: List[Dict[str, object]],
+                      pairs: Sequence[Dict[str, object]] = ()) -> List[Dict[str, object]]:
+    """
+    Per-agent criticality: the agent's single-failure outcome and, if pairs
+    were simulated, the worst and mean outcomes of the pairs containing it.
+    Rows are sorted from most to least critical (lowest recovery fraction,
+    then longest recovery, then largest deviation).
+    """
+    table = []
+    for a in range(num_agents):
+        row = {
+            'agent': a,
+            'recovery_fraction': singles[a]['recovery_fraction'],
+            'mean_recovery_time': singles[a]['mean_recovery_time'],
+            'max_deviation': singles[a]['max_deviation'],
+        }
+        involved = [p for p in pairs if a in p['agents']]
+        if involved:
+            times = [p['mean_recovery_time'] for p in involved if p['mean_recovery_time'] is not None]
+            row['pair_min_recovery_fraction'] = min(p['recovery_fraction'] for p in involved)
+            row['pair_mean_recovery_time'] = float(np.mean(times)) if times else None
+            row['pair_max_deviation'] = max(p['max_deviation'] for p in involved)
+        table.append(row)
+
+    def key(row):
+        t = row['mean_recovery_time']
+        return (row['recovery_fraction'], -(t if t is not None else float('inf')), -row['max_deviation'])
+
+    return sorted(table, key=key)
+
+
+def save_robustness(result: Dict[str, object], n: int, s: int, sufix: str = '',
+                    output_path: Optional[Union[str, Path]] = None) -> Path:
+    """Save a ``robustness_map`` result as JSON (default in ``PATHS['simulation']``)."""
+    if output_path is None:
+        output_path = PATHS['simulation'] / f"robustness_N{n:d}s{s:d}{sufix}.json"
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(result, f, indent=2)
+    return output_path
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Single/double failure robustness map of a graph_data file.")
+    parser.add_argument('n', type=int, help="Number of agents (N in the file name)")
+    parser.add_argument('s', type=int, help="Number of spots (s in the file name)")
+    parser.add_argument('--sufix', default='', help="File name suffix, e.g. _o")
+    parser.add_argument('--idx', type=int, default=None, help="Pattern index (default: all)")
+    parser.add_argument('--pairs', action='store_true', help="Also simulate every pair of agents")
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--down-time', type=int, default=10)
+    parser.add_argument('--lapse', type=int, default=1)
+    parser.add_argument('--runs', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=54)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    data = load_graph_data(args.n, args.s, args.sufix)
+    indices = range(len(data)) if args.idx is None else [args.idx]
+    for idx in indices:
+        if not isinstance(data[idx], dict):
+            continue
+        result = robustness_map(args.n, args.s, idx, args.sufix, pairs=args.pairs,
+                                Nsteps=args.steps, down_time=args.down_time, lapse=args.lapse,
+                                runs=args.runs, seed=args.seed, workers=args.workers, data=data)
+        path = save_robustness(result, args.n, args.s, f"{args.sufix}_{idx}")
+        print(f"Pattern {idx}: {path}")
+        for row in result['criticality'][:10]:
+            print(row)
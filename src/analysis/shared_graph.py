@@ -0,0 +1,166 @@
+import numpy as np
+
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+from analysis.simulation import AgentArrays, group_by_agent
+
+
+# Alignment of every array inside the shared block
+_ALIGN = 64
+
+
+class SharedGraph:
+    """
+    Graph file compiled once into one ``multiprocessing.shared_memory`` block.
+
+    The publisher compiles every pattern into the static ``AgentArrays``
+    arrays (neighbor indices, strategy tables, cycle ids, targets, initial
+    states) plus the node patterns, and copies them into a single shared
+    block. ``handle`` is a small picklable description of the layout; worker
+    processes ``attach`` to it and get read-only NumPy views, so memory does
+    not grow with the number of workers. ``model(idx)`` builds an
+    ``AgentArrays`` over the views for ``simulate_compact``.
+
+    Patterns that cannot be compiled (e.g. a strategy key that does not
+    match the node's neighbors) are left out of the block and listed in
+    ``skipped`` with the error, instead of aborting the whole publication.
+
+    Pool workers share the resource tracker of the process that created the
+    pool, so attaching does not transfer ownership: only the publisher
+    unlinks the block (``close``, or leaving the ``with`` block).
+
+    Example:
+        >>> with SharedGraph.publish(load_graph_data(n, s)) as shared:
+        ...     with ProcessPoolExecutor(initializer=init_worker, initargs=(shared.handle,)) as pool:
+        ...         results = list(pool.map(run, range(len(shared))))
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, handle: Dict[str, object],
+                 owner: bool) -> None:
+        self._shm = shm
+        self.handle = handle
+        self._owner = owner
+        self._views: Dict[Tuple[int, str], np.ndarray] = {}
+        for (idx, name), (offset, dtype, shape) in handle['layout'].items():
+            view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            view.flags.writeable = False
+            self._views[idx, name] = view
+
+    @classmethod
+    def publish(cls, data: list, name: Optional[str] = None) -> 'SharedGraph':
+        """
+        Compile every pattern of a graph structure and copy it to a new shared block.
+
+        Args:
+            data: Graph structure as returned by ``load_graph_data``
+            name: Name of the block (default: chosen by the OS)
+        """
+        compiled, ids, layout, size = {}, {}, {}, 0
+        skipped: Dict[int, str] = {}
+        for idx, pattern_data in enumerate(data):
+            if not isinstance(pattern_data, dict):
+                continue
+            try:
+                arrays, agent_ids, node_ids = AgentArrays.compile(pattern_data)
+            except (KeyError, TypeError, ValueError) as exc:
+                skipped[idx] = repr(exc)
+                continue
+            agent_info = group_by_agent(pattern_data)
+            arrays['pattern'] = np.array([[c == '1' for c in agent_info[a][nid]['pattern']]
+                                          for a in agent_info for nid in agent_info[a]], dtype=np.uint8)
+            ids[idx] = (agent_ids, node_ids)
+            for key, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                compiled[idx, key] = array
+                layout[idx, key] = (size, array.dtype.str, array.shape)
+                size += -(-max(array.nbytes, 1) // _ALIGN) * _ALIGN
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+        for key, array in compiled.items():
+            offset, _, shape = layout[key]
+            np.ndarray(shape, dtype=array.dtype, buffer=shm.buf, offset=offset)[...] = array
+        handle = {'name': shm.name, 'layout': layout, 'ids': ids, 'size': size,
+                  'skipped': skipped}
+        return cls(shm, handle, owner=True)
+
+    @classmethod
+    def attach(cls, handle: Dict[str, object]) -> 'SharedGraph':
+        """Read-only views of a block published by another process."""
+        return cls(shared_memory.SharedMemory(name=handle['name']), handle, owner=False)
+
+    # ------------------------------------------------------------------
+    # Access
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.handle['ids'])
+
+    @property
+    def indices(self) -> List[int]:
+        """Indices of the patterns in the original structure."""
+        return sorted(self.handle['ids'])
+
+    @property
+    def skipped(self) -> Dict[int, str]:
+        """Indices of the patterns left out by ``publish``, with the error."""
+        return self.handle.get('skipped', {})
+
+    @property
+    def nbytes(self) -> int:
+        return self.handle['size']
+
+    def arrays(self, idx: int) -> Dict[str, np.ndarray]:
+        """Read-only views of the arrays of pattern *idx*."""
+        return {name: view for (i, name), view in self._views.items() if i == idx}
+
+    def patterns(self, idx: int) -> np.ndarray:
+        """Node patterns of pattern *idx*, shape (nodes, rows), in ``simulate``'s node order."""
+        return self._views[idx, 'pattern']
+
+    def ids(self, idx: int) -> Tuple[List[str], List[str]]:
+        """Agent ids and node ids of pattern *idx*."""
+        return self.handle['ids'][idx]
+
+    def model(self, idx: int, init_cond: str = None, random_thresh: float = 0.5) -> AgentArrays:
+        """``AgentArrays`` of pattern *idx* over the shared arrays (only its state is private)."""
+        agent_ids, node_ids = self.ids(idx)
+        return AgentArrays.from_arrays(self.arrays(idx), agent_ids, node_ids,
+                                       init_cond=init_cond, random_thresh=random_thresh)
+
+    # ------------------------------------------------------------------
+    # Lifetime
+    # ------------------------------------------------------------------
+    def close(self) -> None:
+        """Release the views; the publisher also unlinks the block."""
+        self._views.clear()
+        try:
+            self._shm.close()
+        except BufferError:
+            # Views are still referenced elsewhere; the mapping goes away with them
+            pass
+        if self._owner:
+            self._shm.unlink()
+            self._owner = False
+
+    def __enter__(self) -> 'SharedGraph':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# Shared graph of the worker processes, set once by the pool initializer
+_WORKER_GRAPH: Optional[SharedGraph] = None
+
+
+def init_worker(handle: Dict[str, object]) -> None:
+    """Pool initializer: attach the worker to a published ``SharedGraph``."""
+    global _WORKER_GRAPH
+    _WORKER_GRAPH = SharedGraph.attach(handle)
+
+
+def worker_graph() -> SharedGraph:
+    """The ``SharedGraph`` attached by ``init_worker`` in this process."""
+    if _WORKER_GRAPH is None:
+        raise RuntimeError("No shared graph attached. Use `init_worker` as the pool initializer.")
+    return _WORKER_GRAPH
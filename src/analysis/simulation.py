@@ -1,24 +1,69 @@
 import json
 import string
+import time
 import numpy as np
+from typing import TYPE_CHECKING
 from config.config import PATHS
+from analysis.trajectory import TrajectoryWriter, load_trajectory
+from patterns.node_ids import GRAPH_KEYS, NodeRegistry, agent_of, split_node_id
 
+if TYPE_CHECKING:
+    from analysis.failures import FailureSchedule
+    from analysis.shared_graph import SharedGraph
+
+
+def compile_strategy(strategy: dict, num_neighbors: int) -> np.ndarray:
+    """
+    Compile a strategy dict into a dense lookup table.
+
+    The table is indexed by the neighbor states packed into an integer, the
+    first neighbor being the most significant bit. Keys may be written with
+    or without commas (``'0,1'`` from ``StrategyGraphBuilder``, ``'01'`` or
+    ``'1'`` from the graph creators), and an ``'any'`` rule fills the whole
+    table. Inputs with no rule are marked with -1 (random action).
+
+    Args:
+        strategy: Mapping from neighbor states to the next node state
+        num_neighbors: Number of neighbors of the node
+
+    Returns:
+        ``int8`` array of length ``2**num_neighbors``
+    """
+    table = np.full(2 ** num_neighbors, -1, dtype=np.int8)
+    if not strategy:
+        return table
+    if 'any' in strategy:
+        table[:] = int(strategy['any'])
+        return table
+    for key, action in strategy.items():
+        bits = key.replace(',', '')
+        if len(bits) != num_neighbors:
+            raise ValueError(f"Strategy key '{key}' does not match {num_neighbors} neighbors.")
+        table[int(bits, 2) if bits else 0] = int(action)
+    return table
 
 
 class Node:
+    __slots__ = ('id', 'strategy', 'neighbors', 'state', 'cycle', 'ones_in_cycle', 'table')
+
     def __init__(self, id: str, strategy: dict, neighbors: list[str], state: str = '0', 
                  cycle: int = -1, ones_in_cycle: int = 0):
         self.id = id
         self.strategy = strategy
-        self.neighbors = neighbors
+        self.neighbors = neighbors if neighbors is not None else []
         self.state = state
         self.cycle = cycle
         self.ones_in_cycle = ones_in_cycle
+        self.table = compile_strategy(strategy, len(self.neighbors))
 
     def __str__(self):
         return f"id:{self.id}\nstrategy:{self.strategy}\nneighbors:{self.neighbors}\nstate:{self.state}"
 
 class Agent:
+    __slots__ = ('id', 'weight', 'state', 'is_down', 'correct', 'print', 'random_thresh',
+                 'num_corrections', 'num_random_fallbacks', 'num_down_randomizations',
+                 'nodes', 'table', 'offsets')
+
     def __init__(self, id: str, node_data: dict, state: str = '0', random_thresh: float = 0.5, print_info: bool = False):
         self.id = id
         self.weight = len(node_data)
@@ -27,20 +72,27 @@ class Agent:
         self.correct = False
         self.print = print_info
         self.random_thresh = random_thresh
+        # Event counters, aggregated by simulate() into a SimulationObserver
+        self.num_corrections = 0
+        self.num_random_fallbacks = 0
+        self.num_down_randomizations = 0
         #print(node_data)
         self.nodes = []
         for nd in node_data:
-            alpha = ''.join(filter(str.isalpha,nd))
             node = Node(
                 id=nd,
                 strategy=node_data[nd]['strat'],
                 neighbors=node_data[nd]['neigh'],
-                state=state if alpha == 'a' else '0',
+                state=state if split_node_id(nd)[1] == 0 else '0',
                 cycle=node_data[nd]['cycle'],
                 ones_in_cycle=node_data[nd]['ones in cycle']
             )
             self.nodes.append(node)
 
+        # Lookup tables of all nodes, concatenated; node i starts at offsets[i]
+        self.table = np.concatenate([node.table for node in self.nodes])
+        self.offsets = np.cumsum([0] + [len(node.table) for node in self.nodes[:-1]])
+
     def get_state(self) -> str:
         state = 0
         for node in self.nodes:
@@ -63,16 +115,23 @@ class Agent:
         self.is_down = False
         self.correct = True
 
-    def take_action(self, key: str, cycle_status: list[int], rng: np.random.Generator = None):
+    def take_action(self, codes: np.ndarray, cycle_status: list[int], rng: np.random.Generator = None):
+        """
+        Update the node states given the packed neighbor states ``codes``
+        (one integer per node, see ``compile_strategy``).
+        """
+        actions = self.table[self.offsets + codes]
         for i in range(self.weight):
-            if key[i] in self.nodes[i].strategy:
-                self.nodes[i].state = self.nodes[i].strategy[key[i]]
+            if actions[i] >= 0:
+                self.nodes[i].state = '1' if actions[i] else '0'
             else:
                 if self.print:
-                    print(f"Agent {self.id}, node {self.nodes[i].id}: key '{key}' not found")
+                    print(f"Agent {self.id}, node {self.nodes[i].id}: input {codes[i]} not found")
                 self.nodes[i].state = rng.choice(['0', '1'])
+                self.num_random_fallbacks += 1
 
         if self.is_down:
+            self.num_down_randomizations += 1
             if self.print:
                 print(f"Agent {self.id} (cycle {self.cycle}) is down. Randomizing state...")
             state_str = self.get_state_str()
@@ -95,6 +154,7 @@ class Agent:
                 if self.correct:
                     if (cycle_status[self.nodes[nid].cycle]-self.nodes[nid].ones_in_cycle != 0):
                         performed_correction = self.correct_state(cycle_status[self.nodes[nid].cycle], nid, rng)
+                        self.num_corrections += performed_correction
                     else:
                         self.correct = False  
         
@@ -135,6 +195,59 @@ class Agent:
             return False
 
 
+class SimulationObserver:
+    """
+    Collects per-phase timings and event counts from ``simulate`` and
+    ``simulate_compact``.
+
+    Timers (seconds) cover key building, ``take_action``, ``ones()`` and state
+    assembly. In ``simulate``'s incremental mode these three updates are done
+    together by one delta pass over the flipped nodes (``_apply_changes``),
+    which is timed as 'apply'; 'keys' and 'ones' then stay at zero and
+    'state' only covers recording the step. 'apply' is zero in the other
+    modes.
+    Counters are the corrections performed by ``correct_state``, the
+    random fallbacks taken when a key is not in a strategy, and the state
+    randomizations of down agents. Subclass and override ``on_step`` to get
+    a callback after every step.
+    """
+
+    PHASES = ('keys', 'take_action', 'ones', 'state', 'apply')
+    EVENTS = ('corrections', 'random_fallbacks', 'down_randomizations')
+
+    def __init__(self) -> None:
+        self.timers = {phase: 0.0 for phase in self.PHASES}
+        self.counters = {event: 0 for event in self.EVENTS}
+        self.steps = 0
+
+    def on_step(self, step: int, state: str, ones_in_cycle: list[int]) -> None:
+        """Called after each simulation step. Does nothing by default."""
+        pass
+
+    def collect(self, agents: list['Agent']) -> None:
+        """Add the event counters accumulated by the agents."""
+        for agent in agents:
+            self.counters['corrections'] += agent.num_corrections
+            self.counters['random_fallbacks'] += agent.num_random_fallbacks
+            self.counters['down_randomizations'] += agent.num_down_randomizations
+
+    def summary(self) -> dict:
+        """Return timers, counters and per-step averages of the timers."""
+        per_step = {phase: t / self.steps if self.steps else 0.0 for phase, t in self.timers.items()}
+        return {'steps': self.steps, 'timers': dict(self.timers),
+                'timers_per_step': per_step, 'counters': dict(self.counters)}
+
+    def __str__(self) -> str:
+        total = sum(self.timers.values())
+        lines = [f"steps: {self.steps}  total time: {total:.4f}s"]
+        for phase, t in self.timers.items():
+            share = 100 * t / total if total > 0 else 0.0
+            lines.append(f"  {phase:<12s} {t:.4f}s ({share:.1f}%)")
+        for event, c in self.counters.items():
+            lines.append(f"  {event:<20s} {c}")
+        return "\n".join(lines)
+
+
 def load_graph_data(n: int, s: int, sufix: str = '') -> dict:
     """
     Load graph data from a JSON file.
@@ -155,6 +268,19 @@ def load_graph_data(n: int, s: int, sufix: str = '') -> dict:
         data = json.load(f)
     return data
 
+def group_by_agent(pattern_data: dict) -> dict:
+    """
+    Group the nodes of one pattern by agent (the digits of the node id).
+
+    Returns:
+        Dictionary mapping agent ids to {node_id: node data}
+    """
+    agent_info = {}
+    for node_id in pattern_data:
+        if node_id not in GRAPH_KEYS:
+            agent_info.setdefault(agent_of(node_id), {})[node_id] = pattern_data[node_id]
+    return agent_info
+
 def get_state(agent_info: dict, t: int) -> str:
     total_state = ''
     for a in agent_info:
@@ -188,6 +314,37 @@ def get_state_from_nodes(agents: list[Agent]) -> str:
 #        state = get_state(agent_info, t)
 #        print(state)
 
+def neighbor_index(agents: list[Agent], id_nodes: dict) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Build the arrays used to pack the neighbor states of every node.
+
+    Returns:
+        Tuple of (neighbor index matrix, bit weight matrix), both of shape
+        (num_nodes, max_neighbors). Padding entries have weight 0.
+    """
+    nodes = [node for agent in agents for node in agent.nodes]
+    k_max = max([len(node.neighbors) for node in nodes] + [1])
+    neigh = np.zeros((len(nodes), k_max), dtype=np.int64)
+    weights = np.zeros((len(nodes), k_max), dtype=np.int64)
+    for r, node in enumerate(nodes):
+        k = len(node.neighbors)
+        neigh[r, :k] = [id_nodes[i] for i in node.neighbors]
+        weights[r, :k] = 1 << np.arange(k - 1, -1, -1)
+    return neigh, weights
+
+def reverse_index(neigh: np.ndarray, bit_weights: np.ndarray) -> list[list[tuple[int, int]]]:
+    """
+    Reverse neighbor adjacency of the arrays built by ``neighbor_index``.
+
+    Returns:
+        For each node, the (reader node, bit weight) pairs of the nodes whose
+        packed input contains it
+    """
+    readers = [[] for _ in range(neigh.shape[0])]
+    for r, c in zip(*np.nonzero(bit_weights)):
+        readers[neigh[r, c]].append((int(r), int(bit_weights[r, c])))
+    return readers
+
 def ones(agents: list[Agent], num_cycles: int) -> list[int]:
     ones_in_cycle = [0 for _ in range(num_cycles)]
     for agent in agents:
@@ -197,6 +354,48 @@ def ones(agents: list[Agent], num_cycles: int) -> list[int]:
                 ones_in_cycle[node.cycle] += 1
     return ones_in_cycle
 
+def _apply_changes(agents: list[Agent], active: list[int], bounds: np.ndarray,
+                   codes: np.ndarray, node_bits: np.ndarray, node_chars: bytearray,
+                   agent_chars: bytearray, readers: list, owner: np.ndarray,
+                   node_cycle: list[int], ones_in_cycle: list[int]) -> tuple:
+    """
+    Incremental step of ``simulate``: propagate the node flips of the agents
+    that acted into the packed inputs, the ones in cycle and the state strings.
+
+    Returns:
+        Tuple of (node state string, agent state string, ones in cycle,
+        agents to evaluate in the next step)
+    """
+    ones_in_cycle = list(ones_in_cycle)
+    dirty = set()
+    for a in active:
+        agent = agents[a]
+        lo = bounds[a]
+        agent_codes = codes[lo:bounds[a + 1]]
+        expected = agent.table[agent.offsets + agent_codes]
+        total = 0
+        for i, node in enumerate(agent.nodes):
+            bit = 1 if node.state == '1' else 0
+            total += bit
+            if bit != expected[i]:
+                # Not the table output (random or corrected): re-evaluate next step
+                dirty.add(a)
+            k = lo + i
+            delta = bit - int(node_bits[k])
+            if delta == 0:
+                continue
+            node_bits[k] = bit
+            node_chars[k] = 48 + bit
+            if node_cycle[k] >= 0:
+                ones_in_cycle[node_cycle[k]] += delta
+            for r, w in readers[k]:
+                codes[r] += delta * w
+                dirty.add(int(owner[r]))
+        agent_chars[a] = 48 + total
+        if agent.is_down or agent.correct:
+            dirty.add(a)
+    return node_chars.decode(), agent_chars.decode(), ones_in_cycle, dirty
+
 def simulate(n: int, s: int, idx: int, Nsteps: int, 
              init_cond: str = None,
              down_times: list[int] = None, 
@@ -205,23 +404,53 @@ def simulate(n: int, s: int, idx: int, Nsteps: int,
              random_thresh: float = 0.5,
              seed: int = 54,
              sufix: str = '',
-             print_info: bool = False
+             print_info: bool = False,
+             data: list = None,
+             observer: SimulationObserver = None,
+             output: str = None,
+             every: int = 1,
+             incremental: bool = False,
+             failures: 'FailureSchedule' = None
              ) -> list[str]:
+    """
+    Simulate the agents of pattern ``idx`` for ``Nsteps`` steps.
+
+    With ``incremental=True`` only agents whose inputs flipped in the previous
+    step, plus agents that are down, correcting or acted randomly, are
+    re-evaluated; packed inputs and ones in cycle are updated by deltas. Its
+    random stream differs from the full mode (idle agents draw no random
+    numbers), so runs are statistically equivalent but not identical for a
+    given seed.
+
+    ``failures`` takes a compiled scenario (``analysis.failures.FailureSchedule``)
+    whose events are looked up per step in O(1); it can be combined with the
+    ``down_*`` lists.
+
+    The two output modes record different states. By default the returned
+    ``pattern`` list holds the initial NODE states (one character per node,
+    in ``NodeRegistry`` order) at index 0 and the AGENT states (``get_state``:
+    ones per agent) after every step at indices 1..Nsteps. With ``output``,
+    every record, including the first, holds the bit-packed NODE states;
+    ``trajectory.agent_states`` turns them into agent states.
+
+    Returns:
+        Tuple of (pattern, ones in cycle per step): lists by default, or
+        read-only memmaps of the packed node states and the ones counts
+        with ``output``
+    """
     #For reproducibility
     rng = np.random.default_rng(seed)
 
-    data = load_graph_data(n, s, sufix)
+    # Preloaded data (e.g. from graphs.fast_graph.get_graph) skips the file read
+    if data is None:
+        data = load_graph_data(n, s, sufix)
     if print_info:
         print(data)
-    agent_info = {}
-    for node_id in data[idx]:
-        if node_id != 'max_cycle_size' and node_id != 'diameter':
-            agent_id = "".join(filter(str.isdigit,node_id))
-            agent_info[agent_id] = agent_info.get(agent_id,{}) | {node_id: data[idx][node_id]}
+    agent_info = group_by_agent(data[idx])
     #print(agent_info) 
     
-    node_ids = [j for i in agent_info for j in agent_info[i]]
-    id_nodes = {v: k for k, v in enumerate(node_ids)}
+    registry = NodeRegistry.from_pattern(data[idx])
+    node_ids = registry.node_ids
     
     ## Initial state---
     prev_state = get_state(agent_info, 0)
@@ -249,6 +478,15 @@ def simulate(n: int, s: int, idx: int, Nsteps: int,
         for a in agents:
             print(f"Agent {a.id} weight: {a.weight} cycles: {a.get_ones_in_cycles()}")
 
+    # Packed neighbor states are computed for all nodes at once each step
+    neigh, bit_weights = neighbor_index(agents, registry.index)
+    bounds = registry.bounds
+    if incremental:
+        readers = reverse_index(neigh, bit_weights)
+        owner = registry.owner
+        node_cycle = [node.cycle for agent in agents for node in agent.nodes]
+        agent_index = {agent.id: a for a, agent in enumerate(agents)}
+
     prev_node_state = get_state_from_nodes(agents)
     if print_info:
         print(get_state_from_agents(agents), get_state_from_nodes(agents))
@@ -264,8 +502,28 @@ def simulate(n: int, s: int, idx: int, Nsteps: int,
 
     ## Simulation loop---
     #print(down_agents)
-    pattern = [prev_node_state]
-    ones_in_c = [ones_in_cycle]
+    # With `output`, node states and ones in cycle are streamed to disk
+    # (see analysis.trajectory) instead of being kept in memory.
+    writer = None
+    if output is not None:
+        writer = TrajectoryWriter(output, node_ids, num_cycles, Nsteps, every=every)
+        writer.write(0, prev_node_state, ones_in_cycle)
+        pattern, ones_in_c = None, None
+    else:
+        pattern = [prev_node_state]
+        ones_in_c = [ones_in_cycle]
+    if incremental:
+        node_chars = bytearray(prev_node_state.encode())
+        agent_chars = bytearray(get_state_from_agents(agents).encode())
+        node_bits = np.frombuffer(bytes(node_chars), dtype=np.uint8) - ord('0')
+        codes = (node_bits[neigh] * bit_weights).sum(axis=1)
+        # Agents to evaluate in the next step
+        dirty = set(range(len(agents)))
+    # Timers are only read when an observer is attached
+    timed = observer is not None
+    if timed:
+        timers = observer.timers
+        clock = time.perf_counter
     for step in range(Nsteps):
         if down_agents is not None:
             if print_info:
@@ -273,18 +531,57 @@ def simulate(n: int, s: int, idx: int, Nsteps: int,
             for i in range(len(down_agents)):            
                 if step == down_times[i]:
                     agents[int(down_agents[i])].is_down = True
+                    if incremental:
+                        dirty.add(agent_index[str(down_agents[i])])
                 if step == down_times[i] + down_lapses[i]:
                     agents[int(down_agents[i])].back_online()
-
-        for agent in agents:
-            keys = []
-            for node in agent.nodes:
-                key = ''.join(prev_node_state[int(id_nodes[i])] for i in node.neighbors)
-                keys.append(key)
-
-            agent.take_action(keys, ones_in_cycle, rng)
-
-        ones_in_cycle = ones(agents, num_cycles)
+                    if incremental:
+                        dirty.add(agent_index[str(down_agents[i])])
+        if failures is not None:
+            for a in failures.going_down(step):
+                agents[a].is_down = True
+            for a in failures.coming_up(step):
+                agents[a].back_online()
+            if incremental:
+                dirty.update(failures.going_down(step).tolist())
+                dirty.update(failures.coming_up(step).tolist())
+
+        if incremental:
+            if timed:
+                t1 = clock()
+            active = sorted(dirty)
+            for a in active:
+                agents[a].take_action(codes[bounds[a]:bounds[a + 1]], ones_in_cycle, rng)
+            if timed:
+                timers['take_action'] += clock() - t1
+                t0 = clock()
+            prev_node_state, state, ones_in_cycle, dirty = _apply_changes(
+                agents, active, bounds, codes, node_bits, node_chars, agent_chars,
+                readers, owner, node_cycle, ones_in_cycle)
+            if timed:
+                t1 = clock()
+                timers['apply'] += t1 - t0
+        else:
+            if timed:
+                t0 = clock()
+            node_bits = np.frombuffer(prev_node_state.encode(), dtype=np.uint8) - ord('0')
+            codes = (node_bits[neigh] * bit_weights).sum(axis=1)
+            if timed:
+                t1 = clock()
+                timers['keys'] += t1 - t0
+
+            for a, agent in enumerate(agents):
+                agent.take_action(codes[bounds[a]:bounds[a + 1]], ones_in_cycle, rng)
+            if timed:
+                timers['take_action'] += clock() - t1
+
+        if not incremental:
+            if timed:
+                t0 = clock()
+            ones_in_cycle = ones(agents, num_cycles)
+            if timed:
+                t1 = clock()
+                timers['ones'] += t1 - t0
 
     #     if np.array([int(a) for a in state]).sum() == s:
     #         state_status = 'normal'
@@ -293,12 +590,379 @@ def simulate(n: int, s: int, idx: int, Nsteps: int,
     #     else:
     #         state_status = 'high'
             
-        state = get_state_from_agents(agents)
-        pattern.append(state)
-        prev_node_state = get_state_from_nodes(agents)
-        ones_in_c.append(ones_in_cycle)
+        if not incremental:
+            state = get_state_from_agents(agents)
+            prev_node_state = get_state_from_nodes(agents)
+        if writer is None:
+            pattern.append(state)
+            ones_in_c.append(ones_in_cycle)
+        else:
+            writer.write(step + 1, prev_node_state, ones_in_cycle)
+        if timed:
+            timers['state'] += clock() - t1
+            observer.steps += 1
+            observer.on_step(step, state, ones_in_cycle)
         if print_info:
             print(f"step: {step}\nstate: {state} {prev_node_state}\nstate_status: {ones_in_cycle}")
             print()
 
+    if observer is not None:
+        observer.collect(agents)
+
+    if writer is not None:
+        # Return read-only memory maps of the packed states and the ones counts
+        states, ones_in_c, _ = load_trajectory(writer.close())
+        return states, ones_in_c
+
+    return pattern, ones_in_c
+
+
+class AgentArrays:
+    """
+    Struct-of-arrays agent model for large graphs.
+
+    Nodes are rows of flat NumPy arrays (state, cycle, target ones in cycle,
+    owner agent, strategy table offset) ordered agent by agent, so agent ``a``
+    owns rows ``bounds[a]:bounds[a + 1]``. Identical strategy tables are
+    stored once. ``AgentView`` objects expose one agent with the ``Agent``
+    interface; they are created on demand and hold no state of their own.
+    """
+
+    # Arrays that depend only on the graph (shared read-only by ``from_arrays`` models)
+    STATIC = ('bounds', 'weight', 'owner', 'cycle', 'ones_target', 'table_offset', 'neigh',
+              'bit_weights', 'table', 'a_node', 'agent_num', 'init_state')
+
+    def __init__(self, pattern_data: dict, init_cond: str = None, random_thresh: float = 0.5):
+        """
+        Build the arrays of one pattern.
+
+        Args:
+            pattern_data: One pattern of the graph structure
+            init_cond: Initial agent states, as in ``simulate`` (default: row 0)
+            random_thresh: Correction probability, as in ``simulate``
+        """
+        arrays, agent_ids, node_ids = self.compile(pattern_data)
+        self._setup(arrays, agent_ids, node_ids, init_cond, random_thresh)
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, agent_ids: list[str], node_ids: list[str],
+                    init_cond: str = None, random_thresh: float = 0.5) -> 'AgentArrays':
+        """
+        Model over precompiled ``STATIC`` arrays (e.g. shared-memory views
+        from ``analysis.shared_graph``), which are used as given, not copied.
+        """
+        model = cls.__new__(cls)
+        model._setup(arrays, agent_ids, node_ids, init_cond, random_thresh)
+        return model
+
+    @staticmethod
+    def compile(pattern_data: dict) -> tuple[dict, list[str], list[str]]:
+        """Static arrays, agent ids and node ids of one pattern."""
+        agent_info = group_by_agent(pattern_data)
+        registry = NodeRegistry.from_pattern(pattern_data)
+        id_nodes = registry.index
+        num_nodes = len(registry)
+
+        arrays = {
+            'bounds': registry.bounds,
+            'weight': np.diff(registry.bounds),
+            'owner': registry.owner,
+            'cycle': np.empty(num_nodes, dtype=np.int32),
+            'ones_target': np.empty(num_nodes, dtype=np.int32),
+            'table_offset': np.empty(num_nodes, dtype=np.int64),
+            'a_node': registry.number == 0,
+            'agent_num': registry.agent_numbers(),
+        }
+        k_max = max([len(nd['neigh'] or []) for a in agent_info for nd in agent_info[a].values()] + [1])
+        neigh = np.zeros((num_nodes, k_max), dtype=np.int32)
+        bit_weights = np.zeros((num_nodes, k_max), dtype=np.int32)
+
+        tables, pool, size = [], {}, 0
+        r = 0
+        for i in registry.agent_ids:
+            for nid, nd in agent_info[i].items():
+                # No strategy found (None): compiles to an all-missing table, as in Node
+                strat = nd['strat'] or {}
+                neighbors = nd['neigh'] or []
+                k = len(neighbors)
+                key = (k, tuple(sorted(strat.items())))
+                if key not in pool:
+                    table = compile_strategy(strat, k)
+                    pool[key] = size
+                    tables.append(table)
+                    size += len(table)
+                arrays['table_offset'][r] = pool[key]
+                neigh[r, :k] = [id_nodes[j] for j in neighbors]
+                bit_weights[r, :k] = 1 << np.arange(k - 1, -1, -1)
+                arrays['cycle'][r] = nd['cycle']
+                arrays['ones_target'][r] = nd['ones in cycle']
+                r += 1
+        arrays['neigh'] = neigh
+        arrays['bit_weights'] = bit_weights
+        arrays['table'] = np.concatenate(tables) if tables else np.zeros(0, dtype=np.int8)
+        arrays['init_state'] = AgentArrays._initial_state(arrays, get_state(agent_info, 0))
+        return arrays, registry.agent_ids, registry.node_ids
+
+    @staticmethod
+    def _initial_state(arrays: dict, prev_state: str) -> np.ndarray:
+        """Node states for the agent states *prev_state*: its 'a' node is on if the agent is."""
+        on = np.frombuffer(prev_state.encode(), dtype=np.uint8) != ord('0')
+        return (arrays['a_node'] & on[arrays['agent_num']]).astype(np.uint8)
+
+    def _setup(self, arrays: dict, agent_ids: list[str], node_ids: list[str],
+               init_cond: str, random_thresh: float) -> None:
+        self.random_thresh = random_thresh
+        self.agent_ids = agent_ids
+        self.node_ids = node_ids
+        for name in self.STATIC:
+            setattr(self, name, arrays[name])
+        self.state = (self._initial_state(arrays, init_cond) if init_cond
+                      else np.array(arrays['init_state'], dtype=np.uint8))
+        self.num_cycles = max(0, int(self.cycle.max()) + 1) if len(self.cycle) else 0
+        self._in_cycle = np.flatnonzero(self.cycle >= 0)
+
+        num_agents = len(agent_ids)
+        self.is_down = np.zeros(num_agents, dtype=bool)
+        self.correct = np.zeros(num_agents, dtype=bool)
+        self.num_corrections = np.zeros(num_agents, dtype=np.int64)
+        self.num_random_fallbacks = np.zeros(num_agents, dtype=np.int64)
+        self.num_down_randomizations = np.zeros(num_agents, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.agent_ids)
+
+    def agent(self, a: int) -> 'AgentView':
+        return AgentView(self, a)
+
+    def codes(self) -> np.ndarray:
+        """Packed neighbor states of every node (see ``compile_strategy``)."""
+        return (self.state[self.neigh] * self.bit_weights).sum(axis=1)
+
+    def ones_in_cycle(self) -> list[int]:
+        idx = self._in_cycle
+        return np.bincount(self.cycle[idx], weights=self.state[idx],
+                           minlength=self.num_cycles).astype(np.int64).tolist()
+
+    def agent_states(self) -> np.ndarray:
+        return np.add.reduceat(self.state, self.bounds[:-1], dtype=np.int64)
+
+    def node_state_str(self) -> str:
+        return (self.state + 48).tobytes().decode()
+
+    def agent_state_str(self) -> str:
+        states = self.agent_states()
+        if states.max(initial=0) < 10:
+            return (states.astype(np.uint8) + 48).tobytes().decode()
+        return ''.join(map(str, states.tolist()))
+
+    def _nodes_of(self, agents: np.ndarray) -> np.ndarray:
+        mask = np.zeros(len(self), dtype=bool)
+        mask[agents] = True
+        return mask[self.owner]
+
+    def step(self, ones_in_cycle: list[int], rng: np.random.Generator,
+             codes: np.ndarray = None) -> None:
+        """
+        Advance all agents one step, vectorized over agents. Mirrors
+        ``Agent.take_action`` and ``Agent.correct_state``: table actions with
+        random fallbacks, randomization of down agents and corrections of
+        agents that came back online, using the previous ``ones_in_cycle``.
+        ``codes`` are the packed neighbor states (default: ``self.codes()``).
+        """
+        if codes is None:
+            codes = self.codes()
+        new = self.table[self.table_offset + codes].astype(np.int8)
+        fallback = np.flatnonzero(new < 0)
+        if len(fallback):
+            new[fallback] = rng.integers(0, 2, size=len(fallback))
+            np.add.at(self.num_random_fallbacks, self.owner[fallback], 1)
+        new = new.astype(np.uint8)
+
+        # One random node per agent, as ``nid`` in take_action
+        nid = self.bounds[:-1] + (rng.random(len(self)) * self.weight).astype(np.int64)
+
+        down = np.flatnonzero(self.is_down)
+        if len(down):
+            self.num_down_randomizations[down] += 1
+            new[self._nodes_of(down)] = 0
+            new[nid[down]] = rng.integers(0, 2, size=len(down))
+
+        cand = np.flatnonzero(~self.is_down & self.correct & (self.cycle[nid] >= 0))
+        if len(cand):
+            status = np.asarray(ones_in_cycle, dtype=np.int64)[self.cycle[nid[cand]]]
+            diff = status - self.ones_target[nid[cand]]
+            self.correct[cand[diff == 0]] = False
+            off = diff != 0
+            cand, diff = cand[off], diff[off]
+            sums = np.add.reduceat(new, self.bounds[:-1], dtype=np.int64)[cand]
+            low = (diff < 0) & (sums == 0)
+            high = (diff > 0) & (sums == 1)
+            draw = np.flatnonzero(low | high)
+            done = draw[rng.random(len(draw)) < self.random_thresh]
+            self.num_corrections[cand[done]] += 1
+            new[self._nodes_of(cand[done])] = 0
+            raise_ = cand[done][low[done]]
+            new[nid[raise_]] = 1
+
+        self.state = new
+
+
+class AgentView:
+    """One agent of an ``AgentArrays`` model, with the ``Agent`` interface."""
+    __slots__ = ('model', 'index')
+
+    def __init__(self, model: AgentArrays, index: int):
+        self.model = model
+        self.index = index
+
+    @property
+    def id(self) -> str:
+        return self.model.agent_ids[self.index]
+
+    @property
+    def weight(self) -> int:
+        return int(self.model.weight[self.index])
+
+    @property
+    def rows(self) -> slice:
+        return slice(self.model.bounds[self.index], self.model.bounds[self.index + 1])
+
+    @property
+    def node_states(self) -> np.ndarray:
+        """View of the agent's node states."""
+        return self.model.state[self.rows]
+
+    @property
+    def is_down(self) -> bool:
+        return bool(self.model.is_down[self.index])
+
+    @is_down.setter
+    def is_down(self, value: bool) -> None:
+        self.model.is_down[self.index] = value
+
+    @property
+    def correct(self) -> bool:
+        return bool(self.model.correct[self.index])
+
+    @correct.setter
+    def correct(self, value: bool) -> None:
+        self.model.correct[self.index] = value
+
+    @property
+    def num_corrections(self) -> int:
+        return int(self.model.num_corrections[self.index])
+
+    @property
+    def num_random_fallbacks(self) -> int:
+        return int(self.model.num_random_fallbacks[self.index])
+
+    @property
+    def num_down_randomizations(self) -> int:
+        return int(self.model.num_down_randomizations[self.index])
+
+    def get_state(self) -> str:
+        return str(int(self.node_states.sum()))
+
+    def get_state_str(self) -> str:
+        return (self.node_states + 48).tobytes().decode()
+
+    def get_ones_in_cycles(self) -> dict[int:int]:
+        rows = self.rows
+        return dict(zip(self.model.cycle[rows].tolist(), self.model.ones_target[rows].tolist()))
+
+    def back_online(self):
+        self.is_down = False
+        self.correct = True
+
+
+def simulate_compact(n: int, s: int, idx: int, Nsteps: int,
+                     init_cond: str = None,
+                     down_times: list[int] = None,
+                     down_lapses: list[int] = None,
+                     down_agents: list[str] = None,
+                     random_thresh: float = 0.5,
+                     seed: int = 54,
+                     sufix: str = '',
+                     data: list = None,
+                     observer: SimulationObserver = None,
+                     output: str = None,
+                     every: int = 1,
+                     failures: 'FailureSchedule' = None,
+                     shared: 'SharedGraph' = None
+                     ) -> list[str]:
+    """
+    ``simulate`` on the array-backed ``AgentArrays`` model, for graphs with
+    up to ~10^5 nodes. Same arguments (no ``print_info``/``incremental``) and
+    outputs; with ``shared`` (an ``analysis.shared_graph.SharedGraph``) the
+    model reads the graph arrays from shared memory instead of ``data``.
+    Every step is vectorized over agents, so the random stream differs from
+    ``simulate``: runs are statistically equivalent but not identical for a
+    given seed. Without failures or random fallbacks the trajectories
+    coincide.
+    """
+    rng = np.random.default_rng(seed)
+    if shared is not None:
+        model = shared.model(idx, init_cond=init_cond, random_thresh=random_thresh)
+    else:
+        if data is None:
+            data = load_graph_data(n, s, sufix)
+        model = AgentArrays(data[idx], init_cond=init_cond, random_thresh=random_thresh)
+    if down_agents is not None:
+        from analysis.failures import FailureSchedule
+        listed = FailureSchedule.from_lists(len(model), Nsteps, down_times, down_lapses, down_agents)
+        failures = listed if failures is None else failures + listed
+
+    ones_in_cycle = model.ones_in_cycle()
+    writer = None
+    if output is not None:
+        writer = TrajectoryWriter(output, model.node_ids, model.num_cycles, Nsteps, every=every)
+        writer.write(0, model.node_state_str(), ones_in_cycle)
+        pattern, ones_in_c = None, None
+    else:
+        pattern = [model.node_state_str()]
+        ones_in_c = [ones_in_cycle]
+
+    # Timers are only read when an observer is attached
+    timed = observer is not None
+    if timed:
+        timers = observer.timers
+        clock = time.perf_counter
+    for step in range(Nsteps):
+        if failures is not None:
+            model.is_down[failures.going_down(step)] = True
+            up = failures.coming_up(step)
+            model.is_down[up] = False
+            model.correct[up] = True
+        if timed:
+            t0 = clock()
+            codes = model.codes()
+            t1 = clock()
+            timers['keys'] += t1 - t0
+            model.step(ones_in_cycle, rng, codes)
+            t0 = clock()
+            timers['take_action'] += t0 - t1
+        else:
+            model.step(ones_in_cycle, rng)
+        ones_in_cycle = model.ones_in_cycle()
+        if timed:
+            t1 = clock()
+            timers['ones'] += t1 - t0
+        if writer is None:
+            state = model.agent_state_str()
+            pattern.append(state)
+            ones_in_c.append(ones_in_cycle)
+        else:
+            writer.write(step + 1, model.node_state_str(), ones_in_cycle)
+        if timed:
+            timers['state'] += clock() - t1
+            observer.steps += 1
+            observer.on_step(step, state if writer is None else None, ones_in_cycle)
+
+    if observer is not None:
+        observer.collect([model.agent(a) for a in range(len(model))])
+
+    if writer is not None:
+        states, ones_in_c, _ = load_trajectory(writer.close())
+        return states, ones_in_c
+
     return pattern, ones_in_c
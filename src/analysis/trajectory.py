@@ -0,0 +1,155 @@
+import json
+import numpy as np
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from patterns.node_ids import agent_of
+
+
+class TrajectoryWriter:
+    """
+    Stream a simulation trajectory to disk in constant memory.
+
+    Node states are bit-packed (8 nodes per byte) and the number of ones in
+    each cycle is stored as a fixed-width ``int32`` array. Records are buffered
+    in chunks and flushed into preallocated ``.npy`` files, so the output can
+    be opened with ``np.load(..., mmap_mode='r')`` or ``load_trajectory``.
+
+    Files written inside ``path`` (a directory):
+        - ``states.npy``: ``uint8`` array of shape (records, ceil(nodes / 8))
+        - ``ones.npy``: ``int32`` array of shape (records, cycles)
+        - ``meta.json``: node ids, decimation and record count
+    """
+
+    def __init__(self, path: Union[str, Path], node_ids: List[str], num_cycles: int,
+                 num_steps: int, every: int = 1, chunk_size: int = 4096) -> None:
+        """
+        Initialize the writer and preallocate the output files.
+
+        Args:
+            path: Output directory
+            node_ids: Node ids in the order states are given
+            num_cycles: Number of cycles tracked in ``ones_in_cycle``
+            num_steps: Number of simulation steps (the initial state is extra)
+            every: Keep one record every ``every`` steps (decimation)
+            chunk_size: Number of records buffered before a flush
+        """
+        if every <= 0:
+            raise ValueError("`every` must be a positive integer.")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.node_ids = list(node_ids)
+        self.num_nodes = len(self.node_ids)
+        self.num_cycles = num_cycles
+        self.every = every
+        self.chunk_size = chunk_size
+        self.num_records = num_steps // every + 1
+        self.num_bytes = (self.num_nodes + 7) // 8
+
+        self._states = np.lib.format.open_memmap(
+            self.path / 'states.npy', mode='w+', dtype=np.uint8,
+            shape=(self.num_records, self.num_bytes))
+        self._ones = np.lib.format.open_memmap(
+            self.path / 'ones.npy', mode='w+', dtype=np.int32,
+            shape=(self.num_records, self.num_cycles))
+        self._buf_states = np.zeros((chunk_size, self.num_nodes), dtype=np.uint8)
+        self._buf_ones = np.zeros((chunk_size, self.num_cycles), dtype=np.int32)
+        self._buffered = 0
+        self._written = 0
+        self._closed = False
+
+    def write(self, step: int, node_state: str, ones_in_cycle: List[int]) -> None:
+        """
+        Record the state after ``step`` steps (0 is the initial state).
+        Steps that are not a multiple of ``every`` are skipped.
+        """
+        if step % self.every != 0:
+            return
+        self._buf_states[self._buffered] = np.frombuffer(node_state.encode(), dtype=np.uint8) - ord('0')
+        self._buf_ones[self._buffered] = ones_in_cycle
+        self._buffered += 1
+        if self._buffered == self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Pack the buffered records and write them to the output files."""
+        if self._buffered == 0:
+            return
+        start, stop = self._written, self._written + self._buffered
+        self._states[start:stop] = np.packbits(self._buf_states[:self._buffered], axis=1)
+        self._ones[start:stop] = self._buf_ones[:self._buffered]
+        self._written = stop
+        self._buffered = 0
+
+    def close(self) -> Path:
+        """
+        Flush pending records, write the metadata and return the output
+        directory. Closing an already closed writer only returns the directory.
+        """
+        if self._closed:
+            return self.path
+        self.flush()
+        self._states.flush()
+        self._ones.flush()
+        meta = {
+            'node_ids': self.node_ids,
+            'num_cycles': self.num_cycles,
+            'every': self.every,
+            'num_records': self._written,
+        }
+        with open(self.path / 'meta.json', 'w') as f:
+            json.dump(meta, f)
+        self._states = self._ones = None
+        self._closed = True
+        return self.path
+
+    def __enter__(self) -> 'TrajectoryWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def load_trajectory(path: Union[str, Path]) -> Tuple[np.ndarray, np.ndarray, Dict[str, object]]:
+    """
+    Open a trajectory written by ``TrajectoryWriter`` without loading it.
+
+    Args:
+        path: Trajectory directory
+
+    Returns:
+        Tuple of (packed states memmap, ones-in-cycle memmap, metadata)
+    """
+    path = Path(path)
+    with open(path / 'meta.json', 'r') as f:
+        meta = json.load(f)
+    n = meta['num_records']
+    states = np.load(path / 'states.npy', mmap_mode='r')[:n]
+    ones = np.load(path / 'ones.npy', mmap_mode='r')[:n]
+    return states, ones, meta
+
+
+def unpack_states(states: np.ndarray, num_nodes: int,
+                  start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+    """
+    Unpack records ``start:stop`` of a packed state array.
+
+    Returns:
+        ``uint8`` array of shape (records, num_nodes) with 0/1 node states
+    """
+    return np.unpackbits(states[start:stop], axis=1, count=num_nodes)
+
+
+def agent_states(node_states: np.ndarray, node_ids: List[str]) -> np.ndarray:
+    """
+    Sum unpacked node states per agent (agent id = digits of the node id).
+
+    Returns:
+        Array of shape (records, agents), agents in order of first appearance
+    """
+    agent_ids = [agent_of(nid) for nid in node_ids]
+    index = {a: k for k, a in enumerate(dict.fromkeys(agent_ids))}
+    owner = np.zeros((len(node_ids), len(index)), dtype=np.int32)
+    owner[np.arange(len(node_ids)), [index[a] for a in agent_ids]] = 1
+    return node_states.astype(np.int32) @ owner
@@ -0,0 +1,114 @@
+import numpy as np
+
+from typing import Dict, Union
+
+ArrayLike = Union[float, int, np.ndarray]
+
+# Golden-section ratio used by the bracketing refinement
+_INV_PHI = (np.sqrt(5.0) - 1.0) / 2.0
+
+
+def Z(p: ArrayLike, N: ArrayLike, B: ArrayLike) -> np.ndarray:
+    """
+    Expected El Farol payoff when each of ``N`` agents attends with
+    probability ``p`` and the bar holds ``B``: attendees score +1 if the
+    attendance ``X`` is at most ``B`` and -1 otherwise, so
+
+        Z = E[X; X <= B] - E[X; X > B] = N p (2 P(Bin(N - 1, p) <= B - 1) - 1).
+
+    ``p``, ``N`` and ``B`` broadcast against each other; a scalar is returned
+    for scalar inputs. This is the function ``notebooks/p_star.ipynb`` imports
+    from ``analysis.z_bayesian`` (it reproduces the p* values stored there).
+    """
+    from scipy.special import bdtr
+
+    p, N, B = np.broadcast_arrays(np.asarray(p, dtype=float), np.asarray(N), np.asarray(B))
+    k = B - 1
+    inside = (k >= 0) & (k < N - 1)
+    # P(Bin(N - 1, p) <= B - 1): 0 below the support, 1 above it
+    cdf = np.where(k >= N - 1, 1.0, 0.0)
+    if inside.any():
+        cdf = cdf.copy()
+        cdf[inside] = bdtr(k[inside], N[inside] - 1, p[inside])
+    z = N * p * (2.0 * cdf - 1.0)
+    return z[()] if z.ndim == 0 else z
+
+
+def p_star(N: ArrayLike, B: ArrayLike, grid_size: int = 65, tol: float = 1e-10,
+           max_iter: int = 100) -> Dict[str, np.ndarray]:
+    """
+    Maximize ``Z`` over ``p`` in [0, 1] for every (N, B) pair at once.
+
+    A coarse grid evaluated in one call locates the best grid point of each
+    pair; its two neighbours bracket the maximum, which is refined by a
+    golden-section search run simultaneously on all pairs.
+
+    Args:
+        N, B: Number of agents and capacities (broadcast against each other)
+        grid_size: Number of points of the coarse grid
+        tol: Width of the final brackets
+        max_iter: Maximum number of golden-section iterations
+
+    Returns:
+        Dictionary with 'p' (the maximizers) and 'Z' (the maxima), with the
+        broadcast shape of N and B
+    """
+    N, B = np.broadcast_arrays(np.asarray(N), np.asarray(B))
+    grid = np.linspace(0.0, 1.0, grid_size)
+    values = Z(grid[:, None], N.ravel()[None, :], B.ravel()[None, :])
+    best = np.argmax(values, axis=0)
+    lo = grid[np.maximum(best - 1, 0)]
+    hi = grid[np.minimum(best + 1, grid_size - 1)]
+
+    n, b = N.ravel(), B.ravel()
+    x1 = hi - _INV_PHI * (hi - lo)
+    x2 = lo + _INV_PHI * (hi - lo)
+    f1, f2 = Z(x1, n, b), Z(x2, n, b)
+    for _ in range(max_iter):
+        if np.all(hi - lo < tol):
+            break
+        left = f1 >= f2
+        # Keep [lo, x2] where f1 >= f2, otherwise [x1, hi]
+        hi = np.where(left, x2, hi)
+        lo = np.where(left, lo, x1)
+        x2_new = np.where(left, x1, lo + _INV_PHI * (hi - lo))
+        x1_new = np.where(left, hi - _INV_PHI * (hi - lo), x2)
+        f1, f2 = (np.where(left, Z(x1_new, n, b), f2),
+                  np.where(left, f1, Z(x2_new, n, b)))
+        x1, x2 = x1_new, x2_new
+
+    p = (lo + hi) / 2.0
+    return {'p': p.reshape(N.shape), 'Z': Z(p, n, b).reshape(N.shape)}
+
+
+def p_equilibrium(N: ArrayLike, B: ArrayLike, tol: float = 1e-12,
+                  max_iter: int = 200) -> np.ndarray:
+    """
+    Equilibrium probability: the root of ``Z`` above ``p*`` (where attending
+    stops paying off on average), found by vectorized bisection. Pairs with
+    ``B >= N`` never cross zero and get ``p = 1``.
+    """
+    N, B = np.broadcast_arrays(np.asarray(N), np.asarray(B))
+    n, b = N.ravel(), B.ravel()
+    lo = p_star(n, b)['p']
+    hi = np.ones_like(lo)
+    never = Z(hi, n, b) >= 0
+    for _ in range(max_iter):
+        if np.all(hi - lo < tol):
+            break
+        mid = (lo + hi) / 2.0
+        positive = Z(mid, n, b) > 0
+        lo = np.where(positive, mid, lo)
+        hi = np.where(positive, hi, mid)
+    return np.where(never, 1.0, (lo + hi) / 2.0).reshape(N.shape)
+
+
+def p_maximizing_Z(N: int, B: int, **kwargs) -> Dict[str, float]:
+    """
+    Drop-in replacement of the Bayesian-optimization helper used by
+    ``notebooks/p_star.ipynb``: returns ``{'p': p*, 'Z': Z(p*)}``. Its
+    optimizer arguments (``init_points``, ``n_iter``, ``verbose``) are
+    accepted and ignored, since ``p_star`` is exact up to ``tol``.
+    """
+    result = p_star(N, B)
+    return {'p': float(result['p']), 'Z': float(result['Z'])}
@@ -1,12 +1,36 @@
+import os
 from pathlib import Path
 
-PATHS = {
-    'patterns': Path(Path.cwd(), '..', 'data', 'patterns').resolve(),
-    'graphs': Path(Path.cwd(), '..', 'data', 'graphs').resolve(),
-    'html': Path(Path.cwd(), '..', 'data', 'html').resolve(),
-    'simulation': Path(Path.cwd(), '..', 'data', 'simulation').resolve(),
-}
+# Data directory: $ALTERNATION_EFP_DATA if set, otherwise <project root>/data.
+# It does not depend on the working directory, and nothing is created at
+# import time; call ensure_paths() (writers do) before writing.
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DATA_ROOT = Path(os.environ.get('ALTERNATION_EFP_DATA', PROJECT_ROOT / 'data')).resolve()
 
-# Check if the paths exist
-for name, folder in PATHS.items():
-    folder.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+PATHS = {}
+
+
+def set_data_root(root) -> dict:
+    """
+    Point every entry of ``PATHS`` to subfolders of *root*.
+
+    ``PATHS`` is updated in place, so modules that imported it see the change.
+    """
+    global DATA_ROOT
+    DATA_ROOT = Path(root).resolve()
+    PATHS.update({
+        'patterns': DATA_ROOT / 'patterns',
+        'graphs': DATA_ROOT / 'graphs',
+        'html': DATA_ROOT / 'html',
+        'simulation': DATA_ROOT / 'simulation',
+    })
+    return PATHS
+
+
+def ensure_paths() -> None:
+    """Create the data folders if they do not exist."""
+    for name, folder in PATHS.items():
+        folder.mkdir(parents=True, exist_ok=True)
+
+
+set_data_root(DATA_ROOT)
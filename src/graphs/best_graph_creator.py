@@ -141,14 +141,14 @@ class GraphCreator:
         
         Args:
             output_path: Optional custom path for output file. 
-                        If None, uses default path in data/graphs.
+                        If None, uses default path in PATHS['graphs'].
         
         Returns:
             Path to the saved JSON file.
         """
         if output_path is None:
-            output_path = (self.project_root / "data" / "graphs" / 
-                          f"graph_data_N{self.N:d}s{self.s:d}_o.json")
+            output_path = PATHS['graphs'] / f"graph_data_N{self.N:d}s{self.s:d}_o.json"
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         
         struct = self.to_structure()
         with open(output_path, 'w') as json_file:
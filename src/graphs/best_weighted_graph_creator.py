@@ -6,6 +6,7 @@ from pathlib import Path
 from typing import Dict, List
 
 from config.config import PATHS
+from patterns.node_ids import make_node_id
 
 
 class EquitableNode:
@@ -51,5 +52,157 @@ class EquitableWeightedAgent:
     
 
 class WeightedGraphCreator:
-    """Creates and manages equitable weighted graphs with specified parameters."""
-    
+    """Creates and manages equitable weighted graphs with specified parameters.
+
+    The weighted graph is the uniform construction of ``GraphCreator`` laid out
+    over ``Neff = sum(procs.values())`` nodes: a main cycle of ``n`` nodes that
+    copy their predecessor, plus twins that copy the cycle node of the previous
+    group. Node slots are assigned to agents with a stride of ``b`` groups, so
+    two nodes of the same agent are never active at the same time.
+    """
+
+    def __init__(self, procs: Dict[int, int], s: int) -> None:
+        """
+        Initialize graph creator with parameters.
+
+        Args:
+            procs: Dictionary mapping each agent id to its weight (number of nodes)
+            s: Number of available spots per turn
+
+        Raises:
+            ValueError: If the weights cannot be scheduled with ``s`` spots
+        """
+        self.procs = procs
+        self.N = len(procs)
+        self.Neff = int(sum(procs.values()))
+        self.s = s
+        if not (0 < s <= self.Neff):
+            raise ValueError("`s` must be in the interval (0, Neff].")
+        if any(w <= 0 for w in procs.values()):
+            raise ValueError("All weights in `procs` must be positive.")
+        if max(procs.values()) * s > self.Neff:
+            raise ValueError("Every agent weight w must satisfy w*s <= Neff, "
+                             "otherwise two nodes of the same agent share a turn.")
+        self.agents: Dict[str, EquitableWeightedAgent] = {}
+        self.nodes: Dict[str, EquitableNode] = {}
+        self.gcd = np.gcd(self.Neff, s)
+        self.n = self.Neff // self.gcd  # cycle length
+        self.b = s // self.gcd  # ones in cycle
+        self.twin_g_size = self.gcd
+
+        # Node layout arrays, indexed by node position (agent-major order)
+        self.node_ids: List[str] = []
+        self.node_agent: np.ndarray = np.empty(0, dtype=int)
+        self.node_group: np.ndarray = np.empty(0, dtype=int)
+        self.node_slot: np.ndarray = np.empty(0, dtype=int)
+
+        # Initialize project root path
+        self.project_root = Path(__file__).parent.parent.parent
+
+    def create_agents(self) -> None:
+        """Create all agents and their nodes, and place nodes in twin groups.
+
+        The ``j``-th node in agent-major order goes to group ``j*b mod n`` and
+        slot ``j // n`` of that group. Consecutive nodes of an agent are thus
+        ``b`` groups apart and, since ``w*b <= n``, never active together.
+        """
+        weights = np.array(list(self.procs.values()), dtype=int)
+        self.node_agent = np.repeat(np.arange(self.N), weights)
+        j = np.arange(self.Neff)
+        self.node_group = (j * self.b) % self.n
+        self.node_slot = j // self.n
+        copy_idx = j - np.repeat(np.cumsum(weights) - weights, weights)
+
+        agent_keys = list(self.procs.keys())
+        self.node_ids = [make_node_id(agent_keys[a], int(c))
+                         for a, c in zip(self.node_agent, copy_idx)]
+
+        self.agents = {str(a): EquitableWeightedAgent(id=str(a), weight=int(w))
+                       for a, w in self.procs.items()}
+        self.nodes = {}
+        for k, node_id in enumerate(self.node_ids):
+            node = EquitableNode(id=node_id)
+            self.nodes[node_id] = node
+            self.agents[str(agent_keys[self.node_agent[k]])].nodes.append(node)
+
+    def set_neighbors(self) -> None:
+        """Set neighbor relationships and cycle membership for all nodes."""
+        # Slot 0 of each group is the cycle node of that group
+        cycle_node = np.empty(self.n, dtype=int)
+        cycle_node[self.node_group[self.node_slot == 0]] = np.flatnonzero(self.node_slot == 0)
+        neigh = cycle_node[(self.node_group - 1) % self.n]
+        cycle = np.where(self.node_slot == 0, 0, -1)
+
+        for k, node_id in enumerate(self.node_ids):
+            self.nodes[node_id].neigh.append(self.node_ids[neigh[k]])
+            self.nodes[node_id].cycle = int(cycle[k])
+
+    def set_number_of_ones_in_cycle(self) -> None:
+        """Set the number of ones in cycle for nodes in the main cycle."""
+        for k in np.flatnonzero(self.node_slot == 0):
+            self.nodes[self.node_ids[k]].ones_in_cycle = int(self.b)
+
+    def generate_patterns(self) -> None:
+        """Generate patterns for all nodes based on graph structure.
+
+        Group ``g`` copies group ``g-1`` and groups ``0..b-1`` start active,
+        so node ``k`` is active at time ``t`` iff ``(g_k - t) mod n < b``.
+        """
+        t = np.arange(self.n)
+        active = ((self.node_group[:, None] - t[None, :]) % self.n) < self.b
+        patterns = np.where(active, '1', '0').tolist()
+
+        freq_1 = int(self.b)
+        freq_0 = int(self.n - freq_1)
+        for k, node_id in enumerate(self.node_ids):
+            self.nodes[node_id].pattern = patterns[k]
+            self.nodes[node_id].input_freq = {"0": freq_0, "1": freq_1}
+
+    def build_graph(self) -> None:
+        """Build the complete graph by executing all setup steps."""
+        self.create_agents()
+        self.set_neighbors()
+        self.set_number_of_ones_in_cycle()
+        self.generate_patterns()
+
+    def to_structure(self) -> List[Dict[str, Dict[str, object]]]:
+        """
+        Convert graph data to structured format for serialization.
+
+        Returns:
+            List containing a dictionary mapping node IDs to their data,
+            grouped by agent.
+        """
+        struct: List[Dict[str, Dict[str, object]]] = [{}]
+        for a in self.agents.values():
+            for node in a.nodes:
+                struct[0][node.id] = node.to_dict()
+        return struct
+
+    def save_to_json(self, output_path: Path = None) -> Path:
+        """
+        Save graph data to JSON file.
+
+        Args:
+            output_path: Optional custom path for output file.
+                        If None, uses default path in PATHS['graphs'].
+
+        Returns:
+            Path to the saved JSON file.
+        """
+        if output_path is None:
+            output_path = PATHS['graphs'] / f"graph_data_N{self.Neff:d}s{self.s:d}_wo.json"
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+
+        struct = self.to_structure()
+        with open(output_path, 'w') as json_file:
+            json.dump(struct, json_file)
+
+        return output_path
+
+    def print_agents(self) -> None:
+        """Print information about all agents and their nodes."""
+        for a in self.agents.values():
+            print(a)
+            for node in a.nodes:
+                print(node)
@@ -1,7 +1,6 @@
 import json
-import networkx as nx
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
 from config.config import PATHS
 
@@ -16,7 +15,11 @@ class CycleAnalyzer:
     - Saves the modified data back to the JSON file
     """
 
-    def __init__(self, num_nodes: int, num_steps: int, sufix: str = '') -> None:
+    # Bump when a change alters the cycle information (invalidates cached artifacts)
+    VERSION = 1
+
+    def __init__(self, num_nodes: int, num_steps: int, sufix: str = '',
+                 struct: Optional[list] = None, verbose: bool = True) -> None:
         """
         Initialize the CycleAnalyzer with a graph data file.
         
@@ -24,12 +27,17 @@ class CycleAnalyzer:
             num_nodes: Number of nodes (agents) in the graph
             num_steps: Number of available spots in the system
             sufix: Suffix for the JSON file name (default: '')
+            struct: Optional in-memory graph structure (e.g. from
+                ``StrategyGraphBuilder.build_graphs``). If given, it is used
+                instead of loading the JSON file.
+            verbose: Whether to print the structure and the cycles found
         """
         self.N = num_nodes
         self.s = num_steps
 
         self.graph_file_path = PATHS['graphs'] / f"graph_data_N{self.N:d}s{self.s:d}{sufix}.json"
-        self.struct = None
+        self.struct = struct
+        self.verbose = verbose
         self.cycles = []  # Placeholder for cycles list
 
     def load_graph_data(self) -> None:
@@ -48,12 +56,29 @@ class CycleAnalyzer:
             List of cycles, where each cycle is a list of node IDs (as strings)
         """
         
+        return self.cycles_and_diameter(self.struct[Npat])
+
+    @staticmethod
+    def cycles_and_diameter(pattern_graph: Dict[str, Any]) -> Tuple[List[List[str]], Optional[int]]:
+        """
+        Detect simple cycles and the diameter of a single pattern graph.
+        
+        Args:
+            pattern_graph: Mapping from node IDs to their data
+            
+        Returns:
+            Tuple of (list of cycles, diameter or None if not connected)
+        """
+        import networkx as nx  # imported lazily, it is slow to load
+
         # Build directed graph from the struct
         DG = nx.DiGraph()
         # Add edges for nodes with strategies
-        for n1 in self.struct[Npat]:
-            for n2 in self.struct[Npat][str(n1)].get("neigh", []):
-                if len(self.struct[Npat][str(n1)].get("strat", {})) > 1:
+        for n1, node in pattern_graph.items():
+            if not isinstance(node, dict):
+                continue
+            for n2 in node.get("neigh") or []:
+                if len(node.get("strat") or {}) > 1:
                     DG.add_edge(n2, n1)
         
         # Detect simple cycles
@@ -99,44 +124,67 @@ class CycleAnalyzer:
             raise ValueError("No graph data loaded. Call load_graph_data() first.")
         
         # Augment each pattern
-        print(self.struct)
+        if self.verbose:
+            print(self.struct)
         for pattern_idx in range(len(self.struct)):
-            cycles, diameter = self.detect_cycles_and_diameter(Npat=pattern_idx)
-            self.cycles.append(cycles)
-            for i in self.struct[pattern_idx].keys():
-                self.struct[pattern_idx][i]['cycle'] = -1
-                self.struct[pattern_idx][i]['ones in cycle'] = 0
-                
-                # Find which cycle this node belongs to
-                for c in range(len(self.cycles[pattern_idx])):
-                    if str(i) in self.cycles[pattern_idx][c]:
-                        self.struct[pattern_idx][str(i)]['cycle'] = c
-                        # Sum the first element of the pattern for all nodes in the cycle
-                        self.struct[pattern_idx][str(i)]['ones in cycle'] = sum(
-                            int(self.struct[pattern_idx][j]["pattern"][0]) 
-                            for j in self.cycles[pattern_idx][c]
-                        )
-                        break
-            max_cyc_sz = max(len(cycle) for cycle in self.cycles[pattern_idx]) if self.cycles[pattern_idx] else 0
-            self.struct[pattern_idx]['max_cycle_size'] = max_cyc_sz
-            self.struct[pattern_idx]['diameter'] = -1 if diameter is None else diameter
+            self.cycles.append(self.augment_pattern(self.struct[pattern_idx]))
+
+    @classmethod
+    def augment_pattern(cls, pattern_graph: Dict[str, Any]) -> List[List[str]]:
+        """
+        Add 'cycle' and 'ones in cycle' to the nodes of one pattern graph, and
+        'max_cycle_size' and 'diameter' to the graph itself (in place).
+        
+        Returns:
+            List of cycles found in the pattern graph
+        """
+        cycles, diameter = cls.cycles_and_diameter(pattern_graph)
+        node_ids = [i for i in pattern_graph if isinstance(pattern_graph[i], dict)]
+        for i in node_ids:
+            pattern_graph[i]['cycle'] = -1
+            pattern_graph[i]['ones in cycle'] = 0
+            
+            # Find which cycle this node belongs to
+            for c in range(len(cycles)):
+                if str(i) in cycles[c]:
+                    pattern_graph[str(i)]['cycle'] = c
+                    # Sum the first element of the pattern for all nodes in the cycle
+                    pattern_graph[str(i)]['ones in cycle'] = sum(
+                        int(pattern_graph[j]["pattern"][0]) 
+                        for j in cycles[c]
+                    )
+                    break
+        max_cyc_sz = max(len(cycle) for cycle in cycles) if cycles else 0
+        pattern_graph['max_cycle_size'] = max_cyc_sz
+        pattern_graph['diameter'] = -1 if diameter is None else diameter
+        return cycles
     
     def save_graph_data(self) -> None:
         """Save the augmented graph data back to the JSON file."""
         if self.struct is None:
             raise ValueError("No graph data to save. Load data first.")
         
+        self.graph_file_path.parent.mkdir(parents=True, exist_ok=True)
         with open(self.graph_file_path, 'w') as json_file:
             json.dump(self.struct, json_file)
 
-    def process(self) -> None:
+    def process(self, save: bool = True) -> list:
         """
         Run the complete pipeline: load, detect cycles, augment, and save.
+        The JSON file is only read if no structure was given, and only
+        written if ``save`` is True.
+        
+        Returns:
+            The augmented graph structure
         """
-        self.load_graph_data()
+        if self.struct is None:
+            self.load_graph_data()
         self.augment_struct_with_cycles()
         #print(self.struct)
-        self.save_graph_data()
-        for pattern_idx in range(len(self.struct)):
-            print(f"Pattern {pattern_idx}:")
-            self.print_cycle_ones(Npat=pattern_idx)
+        if save:
+            self.save_graph_data()
+        if self.verbose:
+            for pattern_idx in range(len(self.struct)):
+                print(f"Pattern {pattern_idx}:")
+                self.print_cycle_ones(Npat=pattern_idx)
+        return self.struct
@@ -1,122 +1,124 @@
-import numpy as np
-import json
+from __future__ import annotations
 
-from typing import Dict, List
-#from config.config import PATHS
+import hashlib
+import json
+import os
 
 from pathlib import Path
-project_root = Path(__file__).parent.parent.parent
-
-class EquitableAgent:
-    def __init__(self, 
-                 id: int
-                 ) -> None:
-        self.id: int = id
-        self.pattern: List[str] = []
-        self.neigh: List[str] = []
-        self.strat: Dict[str, str] = {"0": "0", "1": "1"}
-        self.input_freq: Dict[str, int] = {}
-        self.cycle: int = -1
-        self.ones_in_cycle: int = 0
-
-    def __str__(self) -> str:
-        return f"Agent: {self.id}\n pattern: {self.pattern}\n neighbors {self.neigh}\n strategy: {self.strat}\n input_freq: {self.input_freq}\n cycle: {self.cycle}\n ones_in_cycle: {self.ones_in_cycle}"
-
-    
-def set_neighbors(agents: List[EquitableAgent], N: int, s: int) -> None:
-    gcd = np.gcd(N, s)
-    n = N // gcd
-
-    twin_g_size = gcd
-    twin_groups = [agents[i:i+twin_g_size] for i in range(0, N, twin_g_size)]
-    #print(f"twin groups: {[ [agent.id for agent in group] for group in twin_groups ]}")
-
-    # Create the main cycle
-    for g_id in range(n):
-        next_id = (g_id+1) % n
-        agents[twin_groups[g_id][0].id].cycle = 0
-        agents[twin_groups[next_id][0].id].neigh.append(str(twin_groups[g_id][0].id))
-
-    # Add the rest of the neighbors
-    for g_id in range(n):
-        next_id = (g_id+1) % n
-        for i in range(1,twin_g_size):
-            agents[twin_groups[next_id][i].id].neigh.append(str(twin_groups[g_id][0].id))
-
-def set_number_of_ones_in_cycle(agents: List[EquitableAgent], N: int, s: int) -> None:
-    gcd = np.gcd(N, s)
-    n = N // gcd
-    b = s // gcd
-
-    twin_g_size = gcd
-    twin_groups = [agents[i:i+twin_g_size] for i in range(0, N, twin_g_size)]
-
-    for g_id in range(n):
-        agents[twin_groups[g_id][0].id].ones_in_cycle = int(b)
-
-def generate_patterns(agents: List[EquitableAgent], N: int, s: int) -> None:
-    gcd = np.gcd(N, s)
-    n = N // gcd
-    b = s // gcd
-
-    twin_g_size = gcd
-    twin_groups = [agents[i:i+twin_g_size] for i in range(0, N, twin_g_size)]
-
-    # Initial state in cycle
-    ones = b
-    for i in range(N):
-        if agents[i].cycle == 0:
-            if ones > 0:
-                agents[i].pattern.append('1')
-                ones -= 1
-            else:
-                agents[i].pattern.append('0')
-
-    # Initial state off cycle (copy action of twin in cycle)
-    for g_id in range(n):
-        for i in range(1,twin_g_size):
-            agents[twin_groups[g_id][i].id].pattern.append(agents[twin_groups[g_id][0].id].pattern[0])
-    
-    # Simulate the rest of the period
-    for t in range(1,n):
-        for a in agents:
-            a.pattern.append(agents[int(a.neigh[0])].pattern[t-1])
-        
-    # Input frequency
-    freq_1 = int(sum(map(int, agents[0].pattern)))
-    freq_0 = int(n - freq_1)
-    for a in agents:
-        a.input_freq = {"0": freq_0, "1": freq_1}
-
-
-
-
-if __name__ == "__main__":
-    N = 15
-    s = 9
-
-
-    agents = [EquitableAgent(id=i) for i in range(N)]
-    
-    set_neighbors(agents, N, s)
-    set_number_of_ones_in_cycle(agents, N, s)
-    generate_patterns(agents, N, s)
-    #for a in agents:        
-    #    print(a)
-
-    struct: List[Dict[int, Dict[str, object]]] = [{}]
-    for a in agents:
-        struct[0][a.id] = {"pattern": a.pattern, 
-                           "neigh": a.neigh, 
-                           "strat": a.strat,
-                           "input freq": a.input_freq, 
-                           "cycle": a.cycle, 
-                           "ones in cycle": a.ones_in_cycle}
-        
-    print(struct)
-    
-    # #graph_path = PATHS['graphs'] / f"graph_data_N{N:d}s{s:d}.json"
-    # graph_path = project_root / "data" / "graphs" / f"graph_data_N{N:d}s{s:d}.json"
-    # with open(graph_path, 'w') as json_file:
-    #     json.dump(struct, json_file)
-        
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from config.config import PATHS
+from graphs.best_graph_creator import GraphCreator
+from graphs.best_weighted_graph_creator import WeightedGraphCreator
+
+
+# In-process cache: parameter key -> graph structure
+_GRAPH_CACHE: Dict[Tuple, List[Dict[str, object]]] = {}
+
+# Summary keys every cached graph must carry
+_SUMMARY_KEYS = ('max_cycle_size', 'diameter')
+
+
+def _normalize_weights(N: int, weights: Optional[Union[Dict[int, int], Sequence[int]]]) -> Optional[Dict[int, int]]:
+    """Return weights as a ``procs`` dict, or ``None`` for the uniform case."""
+    if weights is None:
+        return None
+    procs = dict(weights) if isinstance(weights, dict) else dict(enumerate(weights))
+    if len(procs) != N:
+        raise ValueError(f"Expected {N} weights, got {len(procs)}.")
+    if all(int(w) == 1 for w in procs.values()):
+        return None
+    return {int(a): int(w) for a, w in procs.items()}
+
+
+def _cache_key(N: int, s: int, procs: Optional[Dict[int, int]]) -> Tuple:
+    return (N, s) if procs is None else (N, s, tuple(sorted(procs.items())))
+
+
+def _cache_path(N: int, s: int, procs: Optional[Dict[int, int]]) -> Path:
+    """
+    File used as on-disk cache. The uniform graph shares the ``_o`` file
+    written by ``GraphCreator.save_to_json`` so existing loaders can read it;
+    files written there without the summary keys are rebuilt by ``get_graph``.
+    """
+    if procs is None:
+        return PATHS['graphs'] / f"graph_data_N{N:d}s{s:d}_o.json"
+    Neff = sum(procs.values())
+    digest = hashlib.sha1(json.dumps(sorted(procs.items())).encode()).hexdigest()[:10]
+    return PATHS['graphs'] / f"graph_data_N{Neff:d}s{s:d}_wo{digest}.json"
+
+
+def _diameter(n: int, twin_g_size: int) -> int:
+    """
+    Diameter of the undirected dependency graph: a cycle of ``n`` nodes with
+    ``twin_g_size - 1`` leaves hanging off every cycle node.
+    """
+    if twin_g_size == 1:
+        return n // 2
+    if n == 1:
+        return 2 if twin_g_size > 2 else 1
+    return n // 2 + 2
+
+
+def _build(N: int, s: int, procs: Optional[Dict[int, int]]) -> List[Dict[str, object]]:
+    """Build the optimal graph and add the summary keys set by ``CycleAnalyzer``."""
+    creator = GraphCreator(N, s) if procs is None else WeightedGraphCreator(procs, s)
+    creator.build_graph()
+    struct = creator.to_structure()
+    struct[0]['max_cycle_size'] = int(creator.n)
+    struct[0]['diameter'] = _diameter(int(creator.n), int(creator.twin_g_size))
+    return struct
+
+
+def get_graph(N: int, s: int,
+              weights: Optional[Union[Dict[int, int], Sequence[int]]] = None,
+              use_disk: bool = True) -> List[Dict[str, object]]:
+    """
+    Return the optimal (minimal-dependency) graph for ``N`` agents and ``s`` spots.
+
+    The result has the same layout as ``load_graph_data``: a list with one
+    pattern dict mapping node ids to their data, plus ``'max_cycle_size'`` and
+    ``'diameter'``. Graphs are cached in-process and, if ``use_disk`` is True,
+    in ``PATHS['graphs']``, so repeated calls neither rebuild nor re-read them.
+    The returned structure is shared between callers and must not be modified.
+
+    Args:
+        N: Number of agents
+        s: Number of available spots
+        weights: Optional per-agent weights (``procs`` dict or sequence of length N).
+                 ``None`` or all-ones gives the uniform graph of ``GraphCreator``.
+        use_disk: Whether to read and write the on-disk cache
+
+    Returns:
+        List containing the graph structure
+    """
+    procs = _normalize_weights(N, weights)
+    key = _cache_key(N, s, procs)
+    if key in _GRAPH_CACHE:
+        return _GRAPH_CACHE[key]
+
+    struct = None
+    path = _cache_path(N, s, procs)
+    if use_disk and path.exists():
+        with open(path, 'r') as f:
+            struct = json.load(f)
+        if not all(k in struct[0] for k in _SUMMARY_KEYS):
+            # Written by GraphCreator.save_to_json: rebuild with the summary keys
+            struct = None
+    if struct is None:
+        struct = _build(N, s, procs)
+        if use_disk:
+            # Write atomically so concurrent workers never read a partial file
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, 'w') as json_file:
+                json.dump(struct, json_file)
+            os.replace(tmp_path, path)
+
+    _GRAPH_CACHE[key] = struct
+    return struct
+
+
+def clear_graph_cache() -> None:
+    """Clear the in-process graph cache (the on-disk files are kept)."""
+    _GRAPH_CACHE.clear()
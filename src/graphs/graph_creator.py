@@ -3,6 +3,7 @@ from __future__ import annotations
 import json
 import numpy as np
 
+from pathlib import Path
 from itertools import combinations
 from typing import Dict, List, Tuple, Optional, Sequence, Union
 
@@ -21,13 +22,22 @@ class StrategyGraphBuilder:
         `np.random.RandomState`).  If ``None`` (default) the class creates its
         own `np.random.default_rng()`.  Passing the RNG from the outside gives
         the caller full control over determinism and reproducibility.
+    patterns
+        Patterns to analyse, as produced by ``generate_many()``.  If ``None``
+        (default) they are read from ``PATHS['patterns'] / 'patterns.json'``.
     """
 
+    # Bump when a change alters the inferred graphs (invalidates cached artifacts)
+    VERSION = 1
+
     def __init__(
         self,
         rng: Optional[Union[np.random.Generator, np.random.RandomState]] = None,
+        patterns: Optional[List[Dict[str, Sequence[str]]]] = None,
     ) -> None:
-        self.patterns: List[Dict[str, str]] = self._load_patterns()
+        self.patterns: List[Dict[str, str]] = (
+            patterns if patterns is not None else self._load_patterns()
+        )
         self.N: int = len(self.patterns[0])  
         self.s = np.sum([int(self.patterns[0][i][0]) for i in self.patterns[0]])
 
@@ -41,57 +51,209 @@ class StrategyGraphBuilder:
         #    np.tile(np.arange(self.N), (self.N, 1)) for _ in self.patterns
         #]
         self._neighbour_mats: List[Dict[str, np.ndarray]] = [
-            {i: np.array([j for j in range(self.N) if j != i]) for i in self.patterns[k]} for k in range(len(self.patterns))
+            self._all_neighbours(pat) for pat in self.patterns
         ]
         self._graphs: Optional[List[Dict[int, Dict[str, object]]]] = None
+        # Counters of the branch-and-bound search (see _get_strategy_bounded)
+        self.search_stats: Dict[str, int] = {'subsets': 0, 'pruned': 0, 'at_bound': 0, 'relabeled': 0}
 
     # ------------------------------------------------------------------ #
     #  Public API                                                        #
     # ------------------------------------------------------------------ #
     def build_graphs(
         self,
-        shuffle: bool = True
-    ) -> None:
+        shuffle: bool = True,
+        save: bool = True,
+        graph_path: Optional[Path] = None,
+        search: str = 'exhaustive',
+        symmetry: bool = False,
+        validate: bool = True,
+    ) -> List[Dict[int, Dict[str, object]]]:
         """
         Build a strategy graph for every pattern in ``self.patterns``.
         Returns a list (one element per pattern) with agent-level entries
         ''pattern'', ''neigh'', ''strat'', and ''input freq''.
+        ``search`` and ``symmetry`` select the strategy search, see ``build_graph``.
+
+        With ``validate`` the graphs are replayed (``graphs.validation``) and
+        a ``ValueError`` is raised, before anything is saved, if some pattern
+        is not reproduced by its strategies.
+
+        If ``save`` is True the list is also written to ``graph_path``
+        (default ``PATHS['graphs'] / graph_data_N{N}s{s}.json``).
         """
         if self._graphs is not None:
             return self._graphs                               # already built               
         
 
-        graphs: List[Dict[int, Dict[str, object]]] = []
-        for pat, neigh_mat in zip(self.patterns, self._neighbour_mats):
-            pattern_graph: Dict[int, Dict[str, object]] = {}
-            for agent_idx in pat.keys():#range(self.N):
-                strat_tuple = self._get_strategy(
-                    pattern=pat,
-                    idx=agent_idx,
-                    neighbour_mat=neigh_mat,
-                    shuffle=shuffle,
-                )
-                if strat_tuple is None:
-                    print(f"Error: No deterministic strategy found for agent {agent_idx} in pattern {pat}.")
-                #print(strat_tuple)
-                pattern_graph[agent_idx] = {
-                    "pattern": pat[str(agent_idx)],
-                    "neigh":   strat_tuple[0] if strat_tuple else None,
-                    "strat":   strat_tuple[1] if strat_tuple else None,
-                    "input freq": strat_tuple[2] if strat_tuple else None,
-                }
-            graphs.append(pattern_graph)
+        graphs: List[Dict[int, Dict[str, object]]] = [
+            self.build_graph(pat, neigh_mat, shuffle=shuffle, search=search, symmetry=symmetry)
+            for pat, neigh_mat in zip(self.patterns, self._neighbour_mats)
+        ]
 
         ##THE GRAPHS HAVE TO ENSURE A DISTANCE OF AT LEAST B BETWEEN NODES OF THE SAME AGENT!!!!!
         self._graphs = graphs
-        
-        graph_path = PATHS['graphs'] / f"graph_data_N{self.N:d}s{self.s:d}.json"
-        with open(graph_path, 'w') as json_file:
-          json.dump(graphs, json_file)
+        if validate:
+            from graphs.validation import check_graphs
+            check_graphs(graphs, label=f"N={self.N} s={self.s}")
+
+        if save:
+            if graph_path is None:
+                graph_path = PATHS['graphs'] / f"graph_data_N{self.N:d}s{self.s:d}.json"
+            Path(graph_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(graph_path, 'w') as json_file:
+              json.dump(graphs, json_file)
+        return graphs
+
+    def build_graph(
+        self,
+        pattern: Dict[str, Sequence[str]],
+        neighbour_mat: Optional[Dict[str, np.ndarray]] = None,
+        shuffle: bool = True,
+        search: str = 'exhaustive',
+        symmetry: bool = False,
+    ) -> Dict[str, Dict[str, object]]:
+        """
+        Build the strategy graph of a single pattern.  By default every agent
+        may observe all the others.
+
+        ``search='exhaustive'`` tries the neighbour subsets of each size in
+        (shuffled) order; ``search='bound'`` uses the branch-and-bound search
+        of ``_get_strategy_bounded``.  Both return subsets of minimum size.
+
+        With ``symmetry=True`` an agent whose column is a cyclic time shift
+        (or an identical twin) of an already solved one gets the solved
+        strategy relabeled, see ``_relabel_strategy``, instead of a search.
+        """
+        if search not in ('exhaustive', 'bound'):
+            raise ValueError("`search` must be 'exhaustive' or 'bound'.")
+        if neighbour_mat is None:
+            neighbour_mat = self._all_neighbours(pattern)
+        get_strategy = self._get_strategy if search == 'exhaustive' else self._get_strategy_bounded
+
+        # Rotations of the solved columns: column bytes -> (solved agent, shift)
+        solved: Dict[bytes, Tuple[str, int]] = {}
+        if symmetry:
+            keys = list(pattern.keys())
+            columns = {k: np.array([int(v) for v in pattern[k]], dtype=np.int8) for k in keys}
+            by_column: Dict[bytes, List[str]] = {}
+            for k in keys:
+                by_column.setdefault(columns[k].tobytes(), []).append(k)
+            shift_maps: Dict[int, Optional[Dict[str, str]]] = {}
+
+        pattern_graph: Dict[str, Dict[str, object]] = {}
+        for agent_idx in pattern.keys():
+            strat_tuple = None
+            if symmetry and columns[agent_idx].tobytes() in solved:
+                ref, d = solved[columns[agent_idx].tobytes()]
+                ref_node = pattern_graph[ref]
+                if ref_node["neigh"] is not None:
+                    # Shift maps are only needed above the lower bound
+                    if len(ref_node["neigh"]) > 1 and d not in shift_maps:
+                        shift_maps[d] = self._shift_map(keys, columns, d)
+                    strat_tuple = self._relabel_strategy(
+                        keys, columns, by_column, ref_node, d, shift_maps.get(d),
+                        neighbour_mat[agent_idx])
+                    if strat_tuple is not None:
+                        self.search_stats['relabeled'] += 1
+            if strat_tuple is None:
+                strat_tuple = get_strategy(
+                    pattern=pattern,
+                    idx=agent_idx,
+                    neighbour_mat=neighbour_mat,
+                    shuffle=shuffle,
+                )
+                if symmetry and strat_tuple is not None:
+                    col = columns[agent_idx]
+                    for d in range(len(col)):
+                        solved.setdefault(np.roll(col, -d).tobytes(), (agent_idx, d))
+            if strat_tuple is None:
+                print(f"Error: No deterministic strategy found for agent {agent_idx} in pattern {pattern}.")
+            pattern_graph[agent_idx] = {
+                "pattern": pattern[str(agent_idx)],
+                "neigh":   strat_tuple[0] if strat_tuple else None,
+                "strat":   strat_tuple[1] if strat_tuple else None,
+                "input freq": strat_tuple[2] if strat_tuple else None,
+            }
+        return pattern_graph
 
     # ------------------------------------------------------------------ #
     #  Private helpers                                                   #
     # ------------------------------------------------------------------ #
+    @staticmethod
+    def _shift_map(keys: List[str], columns: Dict[str, np.ndarray], d: int) -> Optional[Dict[str, str]]:
+        """
+        Map every column ``k`` to a column equal to ``k`` shifted ``d`` steps
+        back in time (``c'[t] = c[t + d]``), pairing duplicate columns in
+        order. Returns ``None`` unless the map is a bijection, i.e. unless
+        the pattern is invariant under the shift up to a column permutation.
+        """
+        free: Dict[bytes, List[str]] = {}
+        for k in keys:
+            free.setdefault(columns[k].tobytes(), []).append(k)
+        mapping = {}
+        for k in keys:
+            bucket = free.get(np.roll(columns[k], -d).tobytes())
+            if not bucket:
+                return None
+            mapping[k] = bucket.pop(0)
+        return mapping
+
+    @staticmethod
+    def _relabel_strategy(
+        keys: List[str],
+        columns: Dict[str, np.ndarray],
+        by_column: Dict[bytes, List[str]],
+        ref_node: Dict[str, object],
+        d: int,
+        shift_map: Optional[Dict[str, str]],
+        candidates: np.ndarray,
+    ) -> Optional[Tuple[Tuple[str, ...], Dict[str, str], Dict[str, int]]]:
+        """
+        Strategy of an agent whose column is the solved column of
+        ``ref_node`` shifted by ``d``: if the reference reads columns ``S``,
+        the agent reads their shifted copies (looked up in ``by_column``) and
+        applies the same rule.
+
+        The result is of minimum size when the whole pattern is shift
+        invariant (``shift_map`` is a bijection) or when the reference already
+        meets the lower bound (at most one neighbour); otherwise, or if a
+        shifted copy is missing or not a candidate, ``None`` is returned and
+        the agent is searched normally.
+        """
+        neigh = list(ref_node["neigh"])
+        if not neigh:
+            return (), dict(ref_node["strat"]), dict(ref_node["input freq"])
+        if len(neigh) == 1:
+            # Any column equal to the shifted copy will do
+            match = by_column.get(np.roll(columns[neigh[0]], -d).tobytes())
+            if not match:
+                return None
+            new_neigh = [match[0]]
+        elif shift_map is None:
+            return None
+        else:
+            new_neigh = [shift_map[k] for k in neigh]
+        position = {k: i for i, k in enumerate(keys)}
+        allowed = set(candidates.tolist())
+        if any(position[k] not in allowed for k in new_neigh) or len(set(new_neigh)) < len(new_neigh):
+            return None
+        # Keys are written in position order of the observed columns
+        order = sorted(range(len(new_neigh)), key=lambda i: position[new_neigh[i]])
+        strat, freq = {}, {}
+        for key, action in ref_node["strat"].items():
+            bits = key.split(",")
+            new_key = ",".join(bits[i] for i in order)
+            strat[new_key] = action
+            freq[new_key] = ref_node["input freq"][key]
+        return tuple(new_neigh[i] for i in order), strat, freq
+
+
+    @staticmethod
+    def _all_neighbours(pattern: Dict[str, Sequence[str]]) -> Dict[str, np.ndarray]:
+        """Default neighbour candidates of every agent in *pattern*."""
+        N = len(pattern)
+        return {i: np.array([j for j in range(N) if j != i]) for i in pattern}
 
     @staticmethod
     def _filter_pattern(
@@ -159,6 +321,106 @@ class StrategyGraphBuilder:
 
         return None  # no deterministic strategy found
 
+    @staticmethod
+    def _conditional_entropy(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """H(y | x_c) in bits for every row ``x_c`` of the binary matrix *x*."""
+        T = len(y)
+        h = np.zeros(x.shape[0])
+        for xv in (0, 1):
+            sel = x == xv
+            n_x = sel.sum(axis=1)
+            for yv in (0, 1):
+                n_xy = (sel & (y == yv)).sum(axis=1)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    term = np.where(n_xy > 0, n_xy / T * np.log2(n_xy / np.maximum(n_x, 1)), 0.0)
+                h -= term
+        return h
+
+    def _get_strategy_bounded(
+        self,
+        pattern: Dict[str, str],
+        idx: str,
+        neighbour_mat: Dict[str, np.ndarray],
+        shuffle: bool = True,
+        max_size: Optional[int] = None,
+    ) -> Optional[Tuple[Tuple[str, ...], Dict[str, str], Dict[str, int]]]:
+        """
+        Branch-and-bound version of ``_get_strategy``.
+
+        A neighbour subset is consistent iff, for every pair of times with
+        different targets, some chosen column differs between the two times,
+        so the search is a minimum set cover over those conflicting pairs.
+        Sizes are tried from the analytic lower bound upwards (0 for a
+        constant column, otherwise 1, the size reached by ``GraphCreator``'s
+        construction), so the first subset found has minimum size. At each
+        level the search branches on the uncovered pair with the fewest
+        covering columns, tries columns by decreasing information gain about
+        the target (random tie-break with ``shuffle``) and prunes when even
+        the best remaining column cannot cover the rest in the steps left.
+        """
+        neighbours = neighbour_mat[idx].tolist()
+        keys = list(pattern.keys())
+        y = np.array([int(v) for v in pattern[idx]], dtype=np.int8)
+        y = np.roll(y, -1)                                   # target at t is the action at t + 1
+        if np.all(y == y[0]):                                # lower bound 0: always-do-X rule
+            return (), {"any": str(y[0])}, {"any": 1}
+        T = len(y)
+
+        order = np.array(neighbours, dtype=np.int64)
+        if shuffle:
+            self.rng.shuffle(order)
+        X = np.array([[int(v) for v in pattern[keys[c]]] for c in order], dtype=np.int8)
+        gain = -self._conditional_entropy(X, y)
+        rank = np.argsort(gain, kind='stable')[::-1]        # best information gain first
+        order, X = order[rank], X[rank]
+
+        a, b = np.nonzero(np.triu(y[:, None] != y[None, :]))
+        covers = X[:, a] != X[:, b]                          # column c separates pair p
+        if not covers.any(axis=0).all():
+            return None                                      # some pair cannot be separated
+        num_pairs = covers.shape[1]
+        stats = self.search_stats
+
+        def search(uncovered: np.ndarray, chosen: List[int], left: int) -> Optional[List[int]]:
+            remaining = int(uncovered.sum())
+            if remaining == 0:
+                return chosen
+            if left == 0:
+                return None
+            gains = (covers & uncovered).sum(axis=1)
+            if gains.max() * left < remaining:
+                stats['pruned'] += 1
+                return None
+            # Branch on the most constrained uncovered pair
+            cols = np.nonzero(uncovered)[0]
+            counts = covers[:, cols].sum(axis=0)
+            pair = cols[np.argmin(counts)]
+            for c in np.nonzero(covers[:, pair])[0]:          # rows are in gain order
+                if c in chosen:
+                    continue
+                stats['subsets'] += 1
+                found = search(uncovered & ~covers[c], chosen + [int(c)], left - 1)
+                if found is not None:
+                    return found
+            return None
+
+        max_size = len(neighbours) if max_size is None else max_size
+        for size in range(1, max_size + 1):
+            found = search(np.ones(num_pairs, dtype=bool), [], size)
+            if found is not None:
+                if size == 1:
+                    stats['at_bound'] += 1
+                cols_sorted = sorted(int(order[c]) for c in found)
+                keys_sorted = [keys[i] for i in cols_sorted]
+                mapping: Dict[str, str] = {}
+                counts: Dict[str, int] = {}
+                for t in range(T):
+                    key = ",".join(pattern[k][t] for k in keys_sorted)
+                    mapping[key] = str(y[t])
+                    counts[key] = counts.get(key, 0) + 1
+                return tuple(map(str, keys_sorted)), mapping, counts
+        return None
+
     # ------------------------------------------------------------------ #
     #  Construction helpers                                              #
     # ------------------------------------------------------------------ #
@@ -1,24 +1,30 @@
+from __future__ import annotations
+
 import json
 import random
-import networkx as nx
-from pyvis.network import Network
 
-import matplotlib.colors as mcolors
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, TYPE_CHECKING
 
 from config.config import PATHS
+from patterns.node_ids import agent_of
+
+# networkx, pyvis and matplotlib are imported where they are used, so
+# importing this module stays cheap.
+if TYPE_CHECKING:
+    from pyvis.network import Network
 
 
 def get_num(string: str) -> int:
-    """Extract number from a string."""
-    return int(''.join(filter(str.isdigit, string)))
+    """Extract the agent number from a node id."""
+    return int(agent_of(string))
 
 
 class GraphVisualizer:
     """Class to read graph data and generate interactive HTML visualizations."""
 
-    def __init__(self, num_nodes: int, num_steps: int, mode: str, sufix: str = '') -> None:
+    def __init__(self, num_nodes: int, num_steps: int, mode: str, sufix: str = '',
+                 struct: Optional[list] = None) -> None:
         """
         Initialize the GraphVisualizer.
         
@@ -27,8 +33,10 @@ class GraphVisualizer:
             num_steps: Number of available spots in the system
             mode: Mode of operation. It can be 'pattern' for pattern-based visualization or 'id' for numerical ID-based visualization.
             sufix: Suffix for the JSON file name (default: '')
+            struct: Optional preloaded graph structure (e.g. from
+                ``graphs.fast_graph.get_graph``). If None, it is read from disk.
         """
-        self.struct = None
+        self.struct = struct
         self.N = num_nodes
         self.s = num_steps
         self.mode = mode
@@ -37,6 +45,7 @@ class GraphVisualizer:
         self.output_html_path = PATHS['html'] / f"graph_N{self.N:d}s{self.s:d}{sufix}.html"
         
         # Setup colors and shapes
+        import matplotlib.colors as mcolors
         named_colors = mcolors.CSS4_COLORS
         self.color_names = list(named_colors.keys())
         random.seed(1234)
@@ -131,6 +140,8 @@ class GraphVisualizer:
         n_shapes = {}
         
         for n1 in self.struct[pattern_index]:
+            if n1 == 'diameter' or n1 == 'max_cycle_size':
+                continue
             # Set node colors and shapes based on numerical ID
             pr = get_num(n1)
             n_colors[n1] = self.get_color_id(pr)
@@ -179,6 +190,9 @@ class GraphVisualizer:
         Returns:
             Configured pyvis Network object
         """
+        import networkx as nx
+        from pyvis.network import Network
+
         # Create directed graph
         DG = nx.DiGraph()
         DG.add_nodes_from([i for i in self.struct[pattern_index].keys() if i != 'diameter' and i != 'max_cycle_size'])
@@ -253,6 +267,7 @@ class GraphVisualizer:
             output_path = self.graph_data_path.parent.parent / 'html' / output_filename
         else:
             output_path = self.output_html_path
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         
         ## Generate HTML
         #dnet.show(str(output_path))
@@ -0,0 +1,154 @@
+import json
+import warnings
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from config.config import PATHS
+
+
+def edge_kind(strat: Dict[str, str]) -> str:
+    """
+    Kind of the edges into a node, as ``GraphVisualizer`` colors them: 'copy'
+    (``{'0': '0', '1': '1'}``), 'invert' (``{'0': '1', '1': '0'}``) or 'other'.
+    """
+    if len(strat) == 2 and strat.get('0') is not None and strat.get('1') is not None:
+        if strat['0'] == '0' and strat['1'] == '1':
+            return 'copy'
+        if strat['0'] == '1' and strat['1'] == '0':
+            return 'invert'
+    return 'other'
+
+
+def dependency_graph(pattern_graph: Dict[str, Any]):
+    """
+    Labeled dependency graph of one pattern: an edge ``n2 -> n1`` for every
+    neighbor ``n2`` of a node ``n1`` with a non-constant strategy (the graph
+    ``CycleAnalyzer`` and ``GraphVisualizer`` build), labeled with its
+    ``edge_kind``. Every node is kept, labeled 'const<v>' for a constant
+    strategy or with its number of neighbors otherwise.
+    """
+    import networkx as nx  # imported lazily, it is slow to load
+
+    DG = nx.DiGraph()
+    for n1, node in pattern_graph.items():
+        if not isinstance(node, dict):
+            continue
+        strat = node.get("strat") or {}
+        neigh = node.get("neigh") or []
+        if len(strat) > 1:
+            DG.add_node(n1, kind=f"in{len(neigh)}")
+            kind = edge_kind(strat)
+            for n2 in neigh:
+                DG.add_edge(n2, n1, kind=kind)
+        else:
+            DG.add_node(n1, kind="const" + "".join(strat.values()))
+    return DG
+
+
+def _graph_hash(DG, iterations: int) -> str:
+    import networkx as nx
+
+    with warnings.catch_warnings():
+        # networkx >= 3.5 warns that directed hashes changed; they are only compared within a run
+        warnings.simplefilter('ignore', UserWarning)
+        return nx.weisfeiler_lehman_graph_hash(DG, node_attr='kind', edge_attr='kind',
+                                               iterations=iterations)
+
+
+def wl_hash(pattern_graph: Dict[str, Any], iterations: int = 3) -> str:
+    """Weisfeiler-Lehman hash of the labeled dependency graph of a pattern."""
+    return _graph_hash(dependency_graph(pattern_graph), iterations)
+
+
+def group_isomorphic(struct: list, iterations: int = 3, exact: bool = True) -> List[Dict[str, Any]]:
+    """
+    Group the patterns of a graph file into isomorphism classes of their
+    labeled dependency graphs.
+
+    Patterns are bucketed by ``wl_hash``; equal hashes are necessary but not
+    sufficient, so inside a bucket every pattern is checked with an exact
+    (VF2) label-preserving isomorphism test against the representative of
+    each class found so far. With ``exact=False`` the buckets are the classes.
+
+    Args:
+        struct: List of pattern graphs (as stored in ``graph_data_*.json``)
+        iterations: Number of WL refinement rounds
+        exact: Confirm the classes with an exact isomorphism test
+
+    Returns:
+        List of classes, each a dict with 'hash', 'representative' (index of
+        its first pattern) and 'members' (indices of all its patterns), in
+        order of first appearance
+    """
+    import networkx as nx
+    from networkx.algorithms.isomorphism import categorical_edge_match, categorical_node_match
+
+    node_match = categorical_node_match('kind', None)
+    edge_match = categorical_edge_match('kind', None)
+    classes: List[Dict[str, Any]] = []
+    by_hash: Dict[str, List[int]] = {}
+    graphs: Dict[int, Any] = {}
+    for idx, pattern_graph in enumerate(struct):
+        if not isinstance(pattern_graph, dict):
+            continue
+        graphs[idx] = dependency_graph(pattern_graph)
+        h = _graph_hash(graphs[idx], iterations)
+        for c in by_hash.get(h, []):
+            rep = classes[c]['representative']
+            if not exact or nx.is_isomorphic(graphs[rep], graphs[idx], node_match=node_match,
+                                             edge_match=edge_match):
+                classes[c]['members'].append(idx)
+                break
+        else:
+            by_hash.setdefault(h, []).append(len(classes))
+            classes.append({'hash': h, 'representative': idx, 'members': [idx]})
+    return classes
+
+
+def class_index(classes: List[Dict[str, Any]], num_patterns: int) -> List[Optional[int]]:
+    """Class of every pattern index (``None`` for entries that are not patterns)."""
+    index: List[Optional[int]] = [None] * num_patterns
+    for c, cls in enumerate(classes):
+        for idx in cls['members']:
+            index[idx] = c
+    return index
+
+
+def save_class_index(classes: List[Dict[str, Any]], num_patterns: int, n: int, s: int,
+                     sufix: str = '', output_path: Optional[Union[str, Path]] = None) -> Path:
+    """
+    Save the classes and the pattern -> class index as JSON (default
+    ``PATHS['graphs']/classes_N{n}s{s}{sufix}.json``, next to the graph file).
+    """
+    if output_path is None:
+        output_path = PATHS['graphs'] / f"classes_N{n:d}s{s:d}{sufix}.json"
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump({'classes': classes, 'class_of': class_index(classes, num_patterns)}, f, indent=2)
+    return output_path
+
+
+def load_class_index(n: int, s: int, sufix: str = '') -> Dict[str, Any]:
+    """Load a class index written by ``save_class_index``."""
+    with open(PATHS['graphs'] / f"classes_N{n:d}s{s:d}{sufix}.json", 'r') as f:
+        return json.load(f)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Group the patterns of a graph_data file into isomorphism classes.")
+    parser.add_argument('n', type=int, help="Number of agents (N in the file name)")
+    parser.add_argument('s', type=int, help="Number of spots (s in the file name)")
+    parser.add_argument('--sufix', default='', help="File name suffix, e.g. _o")
+    parser.add_argument('--iterations', type=int, default=3, help="WL refinement rounds")
+    parser.add_argument('--no-exact', action='store_true', help="Skip the exact isomorphism check")
+    args = parser.parse_args()
+
+    with open(PATHS['graphs'] / f"graph_data_N{args.n:d}s{args.s:d}{args.sufix}.json", 'r') as f:
+        struct = json.load(f)
+    classes = group_isomorphic(struct, args.iterations, exact=not args.no_exact)
+    path = save_class_index(classes, len(struct), args.n, args.s, args.sufix)
+    print(f"{len(classes)} classes among {sum(len(c['members']) for c in classes)} patterns: {path}")
@@ -0,0 +1,179 @@
+import json
+import os
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from analysis.simulation import compile_strategy
+from patterns.node_ids import NodeRegistry
+
+
+def _compile_patterns(struct: list, indices: List[int]) -> Dict[str, Any]:
+    """
+    Flat arrays of the nodes of several patterns with the same period:
+    node patterns, neighbor indices (global), bit weights and the offset
+    of every node's table in one pooled strategy table.
+    """
+    patterns, neigh_rows, weight_rows, offsets, broken = [], [], [], [], []
+    tables, pool, size, base = [], {}, 0, 0
+    k_max = 1
+    for idx in indices:
+        registry = NodeRegistry.from_pattern(struct[idx])
+        for nid in registry.node_ids:
+            node = struct[idx][nid]
+            patterns.append([c == '1' for c in node['pattern']])
+            neighbors = node.get('neigh')
+            strat = node.get('strat')
+            if strat is None or neighbors is None:
+                # No strategy was found: never matches
+                broken.append(len(offsets))
+                neighbors, strat = (), {}
+            k = len(neighbors)
+            k_max = max(k_max, k)
+            key = (k, tuple(sorted(strat.items())))
+            if key not in pool:
+                table = compile_strategy(strat, k)
+                pool[key] = size
+                tables.append(table)
+                size += len(table)
+            offsets.append(pool[key])
+            neigh_rows.append([base + registry.index[j] for j in neighbors])
+            weight_rows.append([1 << (k - 1 - c) for c in range(k)])
+        base += len(registry)
+
+    neigh = np.zeros((base, k_max), dtype=np.int64)
+    bit_weights = np.zeros((base, k_max), dtype=np.int64)
+    for r, (row, w) in enumerate(zip(neigh_rows, weight_rows)):
+        neigh[r, :len(row)] = row
+        bit_weights[r, :len(w)] = w
+    return {
+        'pattern': np.array(patterns, dtype=np.uint8).reshape(base, -1),
+        'neigh': neigh,
+        'bit_weights': bit_weights,
+        'table_offset': np.asarray(offsets, dtype=np.int64),
+        'table': np.concatenate(tables),
+        'broken': np.asarray(broken, dtype=np.int64),
+    }
+
+
+def replay(struct: list) -> List[Dict[str, Any]]:
+    """
+    Replay every pattern of a graph structure through its strategies.
+
+    For every node and step ``t`` of the period, the strategy table is looked
+    up at the packed neighbor states of row ``t`` and compared with the
+    node's own state at row ``t + 1`` (cyclically), as ``simulate`` would
+    compute it. All patterns with the same period are checked together with
+    one gather over the pooled strategy tables.
+
+    Returns:
+        One report per pattern with 'pattern' (index), 'valid', 'missing'
+        (nodes without a strategy) and 'mismatches' (``{node id: [steps t
+        whose successor row is not reproduced]}``; inputs with no rule count
+        as mismatches)
+    """
+    by_period: Dict[int, List[int]] = {}
+    for idx, pattern_graph in enumerate(struct):
+        if not isinstance(pattern_graph, dict):
+            continue
+        first = next(v for v in pattern_graph.values() if isinstance(v, dict))
+        by_period.setdefault(len(first['pattern']), []).append(idx)
+
+    reports: Dict[int, Dict[str, Any]] = {}
+    for T, indices in by_period.items():
+        arrays = _compile_patterns(struct, indices)
+        P = arrays['pattern']
+        # codes[node, t]: packed neighbor states at row t
+        codes = np.einsum('nk,nkt->nt', arrays['bit_weights'], P[arrays['neigh']].astype(np.int64))
+        predicted = arrays['table'][arrays['table_offset'][:, None] + codes]
+        wrong = predicted != np.roll(P, -1, axis=1)
+        wrong[arrays['broken']] = True
+
+        base = 0
+        for idx in indices:
+            node_ids = NodeRegistry.from_pattern(struct[idx]).node_ids
+            block = wrong[base:base + len(node_ids)]
+            missing = [node_ids[r - base] for r in arrays['broken'] if base <= r < base + len(node_ids)]
+            mismatches = {node_ids[r]: np.flatnonzero(block[r]).tolist()
+                          for r in np.flatnonzero(block.any(axis=1))
+                          if node_ids[r] not in missing}
+            reports[idx] = {
+                'pattern': idx,
+                'valid': not missing and not mismatches,
+                'missing': missing,
+                'mismatches': mismatches,
+            }
+            base += len(node_ids)
+    return [reports[idx] for idx in sorted(reports)]
+
+
+def invalid_patterns(struct: list) -> List[Dict[str, Any]]:
+    """Reports of ``replay`` for the patterns that are not reproduced."""
+    return [r for r in replay(struct) if not r['valid']]
+
+
+def check_graphs(struct: list, label: str = 'graph') -> None:
+    """
+    Gate: raise ``ValueError`` if any pattern of *struct* is not reproduced
+    by its strategies, summarizing the first failures.
+    """
+    bad = invalid_patterns(struct)
+    if bad:
+        lines = [f"  pattern {r['pattern']}: {len(r['missing'])} nodes without strategy, "
+                 f"{len(r['mismatches'])} mismatching nodes "
+                 f"{dict(list(r['mismatches'].items())[:3])}" for r in bad[:5]]
+        raise ValueError(f"{len(bad)} pattern(s) of {label} do not reproduce their pattern:\n"
+                         + "\n".join(lines))
+
+
+def _validate_file(path: str) -> Dict[str, Any]:
+    with open(path, 'r') as f:
+        struct = json.load(f)
+    reports = replay(struct)
+    return {
+        'path': path,
+        'num_patterns': len(reports),
+        'invalid': [r for r in reports if not r['valid']],
+    }
+
+
+def validate_files(paths: Sequence[Union[str, Path]],
+                   workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Replay the graph files in a process pool, one file per task.
+
+    Returns:
+        One summary per file with 'path', 'num_patterns' and 'invalid'
+        (the ``replay`` reports of the patterns that fail)
+    """
+    paths = [str(p) for p in paths]
+    workers = min(workers or os.cpu_count() or 1, max(1, len(paths)))
+    if workers == 1:
+        return [_validate_file(p) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_validate_file, paths))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from config.config import PATHS
+
+    parser = argparse.ArgumentParser(description="Check that graph files reproduce their patterns.")
+    parser.add_argument('files', nargs='*', type=Path,
+                        help="Graph files (default: every graph_data_*.json in PATHS['graphs'])")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    files = args.files or sorted(PATHS['graphs'].glob('graph_data_*.json'))
+    failed = 0
+    for summary in validate_files(files, args.workers):
+        status = 'ok' if not summary['invalid'] else f"{len(summary['invalid'])} invalid"
+        print(f"{summary['path']}: {summary['num_patterns']} patterns, {status}")
+        for r in summary['invalid'][:5]:
+            print(f"  pattern {r['pattern']}: missing {r['missing'][:5]}, "
+                  f"mismatches {dict(list(r['mismatches'].items())[:5])}")
+        failed += bool(summary['invalid'])
+    raise SystemExit(1 if failed else 0)
@@ -1,11 +1,136 @@
+import hashlib
 import json
 import numpy as np
 
+from itertools import permutations
+from math import factorial
 from pathlib import Path
-from typing import Dict, List, Sequence, Optional, Union
+from typing import Dict, Iterator, List, Sequence, Optional, Tuple, Union
 
 
-class PatternGenerator:
+def pattern_digest(pattern: Dict[str, List[str]]) -> bytes:
+    """Digest of a pattern: its keys, its shape and its bit-packed entries."""
+    keys = list(pattern)
+    flat = "".join("".join(pattern[k]) for k in keys).encode()
+    bits = np.frombuffer(flat, dtype=np.uint8) == ord("1")
+    h = hashlib.blake2b(digest_size=16)
+    h.update(",".join(map(str, keys)).encode())
+    h.update(np.array([len(keys), len(flat)], dtype=np.int64).tobytes())
+    h.update(np.packbits(bits).tobytes())
+    return h.digest()
+
+
+def _multiset_permutations(labels: List[int]) -> Iterator[List[int]]:
+    """Distinct permutations of *labels*, in lexicographic order."""
+    a = sorted(labels)
+    while True:
+        yield list(a)
+        i = len(a) - 2
+        while i >= 0 and a[i] >= a[i + 1]:
+            i -= 1
+        if i < 0:
+            return
+        j = len(a) - 1
+        while a[j] <= a[i]:
+            j -= 1
+        a[i], a[j] = a[j], a[i]
+        a[i + 1:] = reversed(a[i + 1:])
+
+
+class UniquePatternsMixin:
+    """Unique-pattern mode shared by the pattern generators.
+
+    With ``unique=True``, ``generate`` never returns a pattern it already
+    returned: a hash index of the digests (``pattern_digest``) of the emitted
+    patterns is kept, and random draws are repeated until a new one comes up.
+    When the number of arrangements reachable by the enabled permutations is
+    at most ``enumerate_limit``, they are instead enumerated once (distinct
+    column arrangements times row orders, deduplicated by digest) and emitted
+    in random order, so exactly the distinct patterns are produced and
+    ``ValueError`` is raised once they are exhausted. The enumeration covers
+    the arrangements of the single base returned by ``_enumeration_base``;
+    patterns that are not a permutation of it are never produced.
+
+    Subclasses provide ``_base()`` (unpermuted column-centric pattern),
+    ``_finish(pattern)`` (final form of a permuted pattern) and ``_draw()``
+    (one random pattern), and may override ``_enumeration_base()``.
+    """
+
+    # Random draws allowed to find a new pattern before giving up
+    MAX_ATTEMPTS = 10_000
+
+    def _init_unique(self, unique: bool, enumerate_limit: int) -> None:
+        self.unique = unique
+        self.enumerate_limit = enumerate_limit
+        self._seen: set = set()
+        # Shuffled (digest, pattern) list in enumeration mode, False in random mode
+        self._pending: Union[None, bool, List[Tuple[bytes, dict]]] = None
+
+    def reset_index(self) -> None:
+        """Forget the patterns emitted so far."""
+        self._seen.clear()
+        self._pending = None
+
+    def _arrangements(self, base: dict) -> Tuple[int, Iterator[dict]]:
+        """Upper bound on the distinct arrangements of *base* and an iterator over them."""
+        keys = list(base)
+        cols = [tuple(base[k]) for k in keys]
+        distinct = list(dict.fromkeys(cols))
+        labels = [distinct.index(c) for c in cols]
+        num_rows = len(cols[0])
+
+        count = 1
+        if self.permute_columns:
+            count = factorial(len(labels))
+            for label in set(labels):
+                count //= factorial(labels.count(label))
+        if self.permute_rows:
+            count *= factorial(num_rows)
+
+        def iterate():
+            orders = _multiset_permutations(labels) if self.permute_columns else [labels]
+            for order in orders:
+                row_orders = permutations(range(num_rows)) if self.permute_rows else [range(num_rows)]
+                for rows in row_orders:
+                    yield {k: [distinct[label][r] for r in rows] for k, label in zip(keys, order)}
+        return count, iterate()
+
+    def _enumeration_base(self) -> dict:
+        """Base pattern whose arrangements are enumerated."""
+        return self._base()
+
+    def _next_unique(self) -> dict:
+        if self._pending is None:
+            count, arrangements = self._arrangements(self._enumeration_base())
+            if count <= self.enumerate_limit:
+                found: Dict[bytes, dict] = {}
+                for p in arrangements:
+                    found.setdefault(pattern_digest(self._finish(p)), p)
+                items = list(found.items())
+                self._pending = [items[i] for i in self.rng.permutation(len(items))]
+            else:
+                self._pending = False
+
+        if self._pending is not False:
+            while self._pending:
+                digest, p = self._pending.pop()
+                if digest not in self._seen:
+                    self._seen.add(digest)
+                    # Finished again so per-pattern state (e.g. final_weights) matches it
+                    return self._finish(p)
+            raise ValueError(f"Only {len(self._seen)} distinct patterns exist with these permutations.")
+
+        for _ in range(self.MAX_ATTEMPTS):
+            p = self._draw()
+            digest = pattern_digest(p)
+            if digest not in self._seen:
+                self._seen.add(digest)
+                return p
+        raise RuntimeError(f"No new pattern found in {self.MAX_ATTEMPTS} draws "
+                           f"({len(self._seen)} emitted so far).")
+
+
+class PatternGenerator(UniquePatternsMixin):
     """Generate binary patterns with optional column and row permutations.
 
     A *pattern* is built by sliding a window of ones (size ``step``) across a
@@ -35,6 +160,12 @@ class PatternGenerator:
     rng : numpy.random.Generator, optional
             Random‑number generator for reproducibility.  If *None*,
             ``np.random.default_rng()`` is used.
+    unique : bool, default ``False``
+        If *True*, never return the same pattern twice (see
+        ``UniquePatternsMixin``).
+    enumerate_limit : int, default ``50000``
+        In unique mode, enumerate the permutations systematically when there
+        are at most this many arrangements.
     """
 
     def __init__(
@@ -45,6 +176,8 @@ class PatternGenerator:
         permute_columns: bool = False,
         permute_rows: bool = False,
         rng: Optional[np.random.Generator] = None,
+        unique: bool = False,
+        enumerate_limit: int = 50_000,
     ) -> None:
         if not (0 < step <= N):
             raise ValueError("`step` must be in the interval (0, N].")
@@ -60,6 +193,7 @@ class PatternGenerator:
 
         # Cache for the most recently generated pattern
         self._pattern: Dict[int, List[str]] = {}
+        self._init_unique(unique, enumerate_limit)
 
     # ------------------------------------------------------------------
     # Private helpers
@@ -85,6 +219,13 @@ class PatternGenerator:
             The generated pattern. Keys are column indices; values are lists of
             ``'0'``/``'1'`` strings of equal length.
         """
+        if self.unique:
+            self._pattern = self._next_unique()
+            return self._pattern
+        return self._draw()
+
+    def _base(self) -> Dict[str, List[str]]:
+        """Unpermuted pattern, in column-centric representation."""
         # Step 1 – Build the base pattern as a list of rows, each one representing a the state at a given time -------------
         rows: List[Sequence[str]] = []
         initial_window = list(range(self.step))
@@ -98,10 +239,17 @@ class PatternGenerator:
             window = [(offset + idx) % self.N for idx in range(self.step)]
 
         # Step 2 – Convert to column‑centric representation, where each value is the pattern for an agent through time -------------
-        self._pattern = {
+        return {
             str(col)+'a': [row[col] for row in rows] for col in range(self.N)
         }
 
+    def _finish(self, pattern: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        return pattern
+
+    def _draw(self) -> Dict[str, List[str]]:
+        """One pattern with random permutations."""
+        self._pattern = self._base()
+
         # Step 3 – Optional permutations -------------------------------
         if self.permute_columns:
             for _ in range(self.rng.integers(0, self.N)):
@@ -109,7 +257,7 @@ class PatternGenerator:
                 self._swap_columns(a, b)
 
         if self.permute_rows:
-            num_rows = len(rows)
+            num_rows = len(next(iter(self._pattern.values())))
             for _ in range(self.rng.integers(0, num_rows)):
                 a, b = self.rng.integers(0, num_rows, size=2)
                 self._swap_rows(int(a), int(b))
@@ -126,14 +274,16 @@ class PatternGenerator:
         """
         return [self.generate() for _ in range(self.num_patterns)]
 
-    def save(self, filepath: Union[str, Path]) -> None:
+    def save(self, filepath: Union[str, Path],
+             patterns: Optional[List[Dict[str, List[str]]]] = None) -> None:
         """Save a pattern dictionary to *filepath* in JSON format.
 
         By default, the method saves the most recently generated pattern.
         A custom *patterns* dictionary (e.g., a list of multiple patterns) can
         be supplied instead.
         """
-        patterns = self.generate_many()
+        if patterns is None:
+            patterns = self.generate_many()
 
         file = Path(filepath)
         file.parent.mkdir(parents=True, exist_ok=True)
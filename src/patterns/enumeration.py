@@ -0,0 +1,130 @@
+from math import gcd
+from typing import Dict, Iterator, List, Tuple
+
+from patterns.weighted_alternations import WeightedPatternGenerator
+
+
+def _rotate(x: int, r: int, T: int) -> int:
+    """Shift the column bitmask *x* (bit t = row t) by *r* rows in time."""
+    full = (1 << T) - 1
+    return ((x >> r) | (x << (T - r))) & full if r else x
+
+
+def _columns(T: int, ones: int) -> List[int]:
+    """Bitmasks of length *T* with *ones* bits set, in increasing order."""
+    return [x for x in range(1 << T) if bin(x).count("1") == ones]
+
+
+def canonical_key(groups: List[List[int]], T: int) -> Tuple[Tuple[int, ...], ...]:
+    """
+    Canonical form of a pattern up to column permutation (within each group
+    of agents with the same weight) and cyclic time shift: the smallest, over
+    the ``T`` shifts, of the tuple of sorted column bitmasks of every group.
+    """
+    return min(tuple(tuple(sorted(_rotate(x, r, T) for x in cols)) for cols in groups)
+               for r in range(T))
+
+
+def _enumerate(weights: List[int], spots: int, T: int) -> Iterator[Dict[int, List[str]]]:
+    """
+    Canonical column-centric patterns with ``T`` distinct rows of ``spots``
+    ones each, where agent ``i`` is active ``weights[i]`` times.
+
+    Agents are filled group by group (same weight) with non-decreasing
+    column bitmasks, which fixes the column permutation inside a group;
+    partial row sums are pruned against ``spots`` and only the patterns that
+    are their own canonical form under time shifts are yielded.
+    """
+    order = sorted(range(len(weights)), key=lambda i: (weights[i], i))
+    group_of: List[int] = []
+    for pos, i in enumerate(order):
+        if pos == 0:
+            group_of.append(0)
+        else:
+            group_of.append(group_of[-1] + (weights[i] != weights[order[pos - 1]]))
+    num_groups = group_of[-1] + 1 if order else 0
+    candidates = {w: _columns(T, w) for w in set(weights)}
+    bits = {x: [t for t in range(T) if x >> t & 1] for w in candidates for x in candidates[w]}
+    row_sums = [0] * T
+    chosen: List[int] = []
+    total = len(order)
+
+    def feasible(remaining: int) -> bool:
+        return all(r <= spots and spots - r <= remaining for r in row_sums)
+
+    def dfs(pos: int) -> Iterator[Dict[int, List[str]]]:
+        if pos == total:
+            rows = [tuple(chosen[p] >> t & 1 for p in range(total)) for t in range(T)]
+            if len(set(rows)) < T:
+                return
+            groups = [[] for _ in range(num_groups)]
+            for p, x in enumerate(chosen):
+                groups[group_of[p]].append(x)
+            key = tuple(tuple(g) for g in groups)
+            if canonical_key(groups, T) != key:
+                return
+            pattern = {}
+            for i in range(len(weights)):
+                x = chosen[order.index(i)]
+                pattern[i] = ["1" if x >> t & 1 else "0" for t in range(T)]
+            yield pattern
+            return
+        w = weights[order[pos]]
+        same_group = pos > 0 and group_of[pos] == group_of[pos - 1]
+        lower = chosen[-1] if same_group else 0
+        for x in candidates[w]:
+            if x < lower:
+                continue
+            for t in bits[x]:
+                row_sums[t] += 1
+            if feasible(total - pos - 1):
+                chosen.append(x)
+                yield from dfs(pos + 1)
+                chosen.pop()
+            for t in bits[x]:
+                row_sums[t] -= 1
+
+    yield from dfs(0)
+
+
+def enumerate_patterns(N: int, step: int) -> Iterator[Dict[str, List[str]]]:
+    """
+    Lazily yield every distinct alternation pattern of ``N`` agents with
+    ``step`` ones per row, once per class of column permutations and cyclic
+    time shifts.
+
+    The patterns have the shape of ``PatternGenerator``'s (``N / gcd(N, step)``
+    distinct rows, each agent active ``step / gcd(N, step)`` times, keys
+    ``'<i>a'``); ``PatternGenerator``'s sliding-window pattern is one of them.
+
+    Example:
+        >>> patterns = list(enumerate_patterns(6, 2))
+        >>> StrategyGraphBuilder(rng, patterns=patterns).build_graphs()
+    """
+    if not (0 < step <= N):
+        raise ValueError("`step` must be in the interval (0, N].")
+    g = gcd(N, step)
+    for pattern in _enumerate([step // g] * N, step, N // g):
+        yield {f"{i}a": col for i, col in pattern.items()}
+
+
+def enumerate_weighted_patterns(procs: Dict[int, int], spots: int) -> Iterator[Dict[str, List[str]]]:
+    """
+    Lazily yield every distinct weighted alternation pattern for ``procs``,
+    once per class of permutations of equally weighted agents and cyclic
+    time shifts, expanded into nodes like ``WeightedPatternGenerator``'s.
+
+    As in ``WeightedPatternGenerator``, the weights are repeated the smallest
+    number of times ``m`` for which the turns fill whole rows of ``spots``
+    ones, so agent ``i`` is active ``m * procs[i]`` times in
+    ``m * sum(procs) / spots`` distinct rows.
+    """
+    N = len(procs)
+    if not (0 < spots <= N):
+        raise ValueError("`spots` must be in the interval (0, N].")
+    agents = list(procs)
+    total = sum(procs.values())
+    m = spots // gcd(total, spots)
+    T = m * total // spots
+    for pattern in _enumerate([m * procs[a] for a in agents], spots, T):
+        yield WeightedPatternGenerator._expand({agents[i]: col for i, col in pattern.items()})
@@ -0,0 +1,111 @@
+import re
+import numpy as np
+
+from typing import Dict, Iterable, List, Tuple
+
+
+# Keys of a pattern graph that are not nodes
+GRAPH_KEYS = ('max_cycle_size', 'diameter')
+
+_NODE_ID = re.compile(r"(\d+)([a-z]+)$")
+
+
+def node_suffix(k: int) -> str:
+    """
+    Letters of the ``k``-th node of an agent in bijective base 26: 'a'..'z',
+    then 'aa', 'ab', ... so agents are not limited to 26 nodes and the ids
+    of the first 26 nodes are unchanged.
+    """
+    if k < 0:
+        raise ValueError("Node numbers must be non-negative.")
+    letters = []
+    k += 1
+    while k:
+        k, r = divmod(k - 1, 26)
+        letters.append(chr(ord('a') + r))
+    return ''.join(reversed(letters))
+
+
+def suffix_number(suffix: str) -> int:
+    """Inverse of ``node_suffix``."""
+    k = 0
+    for c in suffix:
+        k = 26 * k + ord(c) - ord('a') + 1
+    return k - 1
+
+
+def make_node_id(agent, k: int) -> str:
+    """Id of the ``k``-th node of *agent*, e.g. ``make_node_id(3, 0) == '3a'``."""
+    return f"{agent}{node_suffix(k)}"
+
+
+def split_node_id(nid: str) -> Tuple[str, int]:
+    """Agent id and node number of a node id, e.g. ``'12ab' -> ('12', 27)``."""
+    match = _NODE_ID.match(nid)
+    if match:
+        return match.group(1), suffix_number(match.group(2))
+    # Same rule as the digit/letter filters used on legacy ids
+    return ''.join(filter(str.isdigit, nid)), suffix_number(''.join(filter(str.isalpha, nid)))
+
+
+def agent_of(nid: str) -> str:
+    """Agent id of a node id."""
+    return split_node_id(nid)[0]
+
+
+class NodeRegistry:
+    """
+    Dense integer ids for the nodes and agents of one pattern graph.
+
+    Node ids are interned once, agent by agent in order of first appearance
+    (the order of ``analysis.simulation.group_by_agent``), so agent ``a``
+    owns the contiguous node range ``bounds[a]:bounds[a + 1]``. Hot paths
+    then index arrays with integers instead of parsing id strings.
+
+    Attributes:
+        node_ids: Node ids, by dense node index
+        agent_ids: Agent ids, by dense agent index
+        owner: Dense agent index of every node
+        number: Node number within its agent (0 for 'a', 1 for 'b', ...)
+        bounds: Node range of every agent, length ``len(agent_ids) + 1``
+    """
+
+    def __init__(self, node_ids: Iterable[str]) -> None:
+        by_agent: Dict[str, List[Tuple[str, int]]] = {}
+        for nid in node_ids:
+            if nid in GRAPH_KEYS:
+                continue
+            agent, k = split_node_id(nid)
+            by_agent.setdefault(agent, []).append((nid, k))
+        self.agent_ids: List[str] = list(by_agent)
+        self.node_ids: List[str] = [nid for a in by_agent for nid, _ in by_agent[a]]
+        self.index: Dict[str, int] = {nid: i for i, nid in enumerate(self.node_ids)}
+        self.agent_index: Dict[str, int] = {a: i for i, a in enumerate(self.agent_ids)}
+        sizes = [len(by_agent[a]) for a in self.agent_ids]
+        self.bounds = np.cumsum([0] + sizes).astype(np.int64)
+        self.owner = np.repeat(np.arange(len(sizes), dtype=np.int32), sizes)
+        self.number = np.array([k for a in by_agent for _, k in by_agent[a]], dtype=np.int32)
+
+    @classmethod
+    def from_pattern(cls, pattern_data: dict) -> 'NodeRegistry':
+        """Registry of the nodes of one pattern (graph-level keys are skipped)."""
+        return cls(k for k, v in pattern_data.items() if isinstance(v, dict))
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_agents(self) -> int:
+        return len(self.agent_ids)
+
+    def intern(self, ids: Iterable[str]) -> np.ndarray:
+        """Dense indices of *ids*."""
+        return np.fromiter((self.index[i] for i in ids), dtype=np.int64)
+
+    def nodes_of(self, agent: int) -> range:
+        """Dense node indices of the agent with dense index *agent*."""
+        return range(int(self.bounds[agent]), int(self.bounds[agent + 1]))
+
+    def agent_numbers(self) -> np.ndarray:
+        """Integer value of every node's agent id (the ids are decimal numbers)."""
+        return np.array([int(a) for a in self.agent_ids], dtype=np.int64)[self.owner]
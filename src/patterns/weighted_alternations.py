@@ -1,12 +1,14 @@
 import json
 import numpy as np
-import string
 
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Union
 
+from patterns.alternations import UniquePatternsMixin
+from patterns.node_ids import make_node_id
 
-class WeightedPatternGenerator:
+
+class WeightedPatternGenerator(UniquePatternsMixin):
     """Generate weighted binary patterns with optional column and row permutations.
 
     The internal representation is *column‑centric*: a ``dict`` that maps each
@@ -32,8 +34,20 @@ class WeightedPatternGenerator:
     rng : numpy.random.Generator, optional
             Random‑number generator for reproducibility.  If *None*,
             ``np.random.default_rng()`` is used.
+    unique : bool, default ``False``
+        If *True*, never return the same (expanded) pattern twice (see
+        ``UniquePatternsMixin``).
+    enumerate_limit : int, default ``50000``
+        In unique mode, enumerate the permutations systematically when there
+        are at most this many arrangements. Only the column and row
+        permutations of one base pattern, built with a fixed seed, are
+        enumerated; ``patterns.enumeration.enumerate_weighted_patterns``
+        lists every distinct pattern.
     """
 
+    # Seed of the base pattern enumerated in unique mode
+    ENUMERATION_SEED = 0
+
     def __init__(
         self,
         procs: Dict[int, int],
@@ -42,6 +56,8 @@ class WeightedPatternGenerator:
         permute_columns: bool = False,
         permute_rows: bool = False,
         rng: Optional[np.random.Generator] = None,
+        unique: bool = False,
+        enumerate_limit: int = 50_000,
     ) -> None:
         self.procs = procs
         self.N = len(procs)
@@ -55,6 +71,7 @@ class WeightedPatternGenerator:
         self.permute_rows = permute_rows
         # Create a dedicated random generator for this instance
         self.rng = rng or np.random.default_rng()
+        self._init_unique(unique, enumerate_limit)
         #print("done initializing.")
     
     # ------------------------------------------------------------------
@@ -81,7 +98,17 @@ class WeightedPatternGenerator:
             The generated pattern. Keys are process indices; values are lists of
             ``'0'``/``'1'`` strings of equal length.
         """
+        if self.unique:
+            return self._next_unique()
+        return self._draw()
+
+    def _base(self, rng: Optional[np.random.Generator] = None) -> Dict[int, List[str]]:
+        """Unpermuted pattern of the processes (before the expansion into nodes).
 
+        *rng* (default ``self.rng``) breaks repeated rows apart, so the base
+        differs between calls unless a fixed generator is given.
+        """
+        rng = rng or self.rng
         # Step 1 – Build the base pattern as a 1D array whose ordering represents the turns. -------------
         # The number of times each process appears in the list is determined by its weight in `procs`,
         # and it is repeated until the total length is a multiple of `spots` (the number of active processes per turn).
@@ -130,11 +157,11 @@ class WeightedPatternGenerator:
         #print("Repeated rows:", repeated)
         for i, j in repeated:
             # Swap element a of row j with a random row k that is not i or j
-            k = self.rng.integers(0, len(sol))
-            a = self.rng.integers(0, len(sol[0]))
+            k = rng.integers(0, len(sol))
+            a = rng.integers(0, len(sol[0]))
             while (k == i or k == j) or ((sol[k][a] in sol[j]) or (sol[j][a] in sol[k])):
-                k = self.rng.integers(0, len(sol))
-                a = self.rng.integers(0, len(sol[0]))
+                k = rng.integers(0, len(sol))
+                a = rng.integers(0, len(sol[0]))
             sol[j][a], sol[k][a] = sol[k][a], sol[j][a]
         #print(sol)
 
@@ -146,38 +173,53 @@ class WeightedPatternGenerator:
             v = ["1" if d in c else "0" for d in D]
             rows.append(v)
         #print(rows)
-        pattern = {
+        return {
             col: [row[col] for row in rows] for col in range(len(D))
         }
 
+    def _draw(self) -> Dict[str, List[str]]:
+        """One expanded pattern with random permutations."""
+        pattern = self._base()
+
         # Step 5 – Optional permutations -------------------------------
         if self.permute_columns:
-            for _ in range(self.rng.integers(0, len(D))):
-                a, b = self.rng.integers(0, len(D), size=2)
+            for _ in range(self.rng.integers(0, self.N)):
+                a, b = self.rng.integers(0, self.N, size=2)
                 self.swap_columns(int(a), int(b), pattern)
                 self.final_weights[a], self.final_weights[b] = self.final_weights[b], self.final_weights[a]
 
         if self.permute_rows:
-            num_rows = len(rows)
+            num_rows = len(next(iter(pattern.values())))
             for _ in range(self.rng.integers(0, num_rows)):
                 a, b = self.rng.integers(0, num_rows, size=2)
                 self.swap_rows(int(a), int(b), pattern)
 
         #print("Final weights:", self.final_weights)
-        
+        return self._expand(pattern)
+
+    def _enumeration_base(self) -> Dict[int, List[str]]:
+        # Deterministic, so the enumerated set does not depend on the draw
+        return self._base(np.random.default_rng(self.ENUMERATION_SEED))
+
+    def _finish(self, pattern: Dict[int, List[str]]) -> Dict[str, List[str]]:
+        self.final_weights = {d: pattern[d].count("1") for d in pattern}
+        return self._expand(pattern)
+
+    @staticmethod
+    def _expand(pattern: Dict[int, List[str]]) -> Dict[str, List[str]]:
+        """Expand the pattern of the processes into one column per node."""
         # Step 6 - expand the pattern by creating a new row for each '1' in the original pattern, 
         # where the new row has a '1' in the same position and '0's elsewhere. This way, 
         # we get a pattern where each node is active in exactly one turn, and the number of 
         # rows equals the total number of active turns across all processes.
         #print(pattern)
-        num_to_letter_map = dict(zip(range(0,26), string.ascii_lowercase))
         expanded = {}
         for i in pattern:
             count = 0
             for j in range(len(pattern[i])):
                 if pattern[i][j] == "1":
                     v = ["1" if k == j else "0" for k in range(len(pattern[i]))]
-                    expanded[str(i) + num_to_letter_map[count]] = v
+                    expanded[make_node_id(i, count)] = v
                     count += 1
         
         return expanded
@@ -193,14 +235,16 @@ class WeightedPatternGenerator:
         """
         return [self.generate() for _ in range(self.num_patterns)]
     
-    def save(self, filepath: Union[str, Path]) -> Tuple[int, List[Dict[int, List[str]]]]:
+    def save(self, filepath: Union[str, Path],
+             patterns: Optional[List[Dict[str, List[str]]]] = None) -> Tuple[int, List[Dict[int, List[str]]]]:
         """Save a pattern dictionary to *filepath* in JSON format.
 
         By default, the method saves the most recently generated pattern.
         A custom *patterns* dictionary (e.g., a list of multiple patterns) can
         be supplied instead.
         """
-        patterns = self.generate_many()
+        if patterns is None:
+            patterns = self.generate_many()
         Neff = len(patterns[0])
 
         file = Path(filepath)
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union
+
+from config.config import PATHS
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for the outputs of the generation stages.
+
+    An artifact is identified by the SHA-256 of its stage name, its parameters
+    and the keys of the artifacts it was computed from. Artifacts are JSON
+    files under ``root/<key[:2]>/<key>.json`` holding the value together with
+    the metadata used to compute the key, so runs with different seeds,
+    permutation flags or weights never overwrite each other.
+    """
+
+    def __init__(self, root: Optional[Union[str, Path]] = None) -> None:
+        """
+        Initialize the store.
+        
+        Args:
+            root: Store directory (default: ``data/artifacts`` next to ``PATHS['graphs']``)
+        """
+        self.root = Path(root) if root is not None else PATHS['graphs'].parent / 'artifacts'
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(stage: str, params: Dict[str, Any], inputs: Sequence[str] = ()) -> str:
+        """Return the content key of a stage output."""
+        payload = json.dumps({'stage': stage, 'params': params, 'inputs': list(inputs)},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def has(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def load(self, key: str) -> Any:
+        """Return the value stored under *key*."""
+        with open(self.path(key), 'r') as f:
+            return json.load(f)['value']
+
+    def save(self, key: str, value: Any, meta: Optional[Dict[str, Any]] = None) -> Path:
+        """Store *value* under *key*; the write is atomic."""
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({'meta': meta or {}, 'value': value}, f)
+        os.replace(tmp_path, path)
+        return path
+
+    def cached(self, stage: str, params: Dict[str, Any], inputs: Sequence[str],
+               compute: Callable[[], Any]) -> Tuple[str, Any]:
+        """
+        Return ``(key, value)`` for a stage, computing and storing the value
+        only if it is not in the store yet.
+        """
+        key = self.key(stage, params, inputs)
+        if self.has(key):
+            self.hits += 1
+            return key, self.load(key)
+        self.misses += 1
+        value = compute()
+        self.save(key, value, {'stage': stage, 'params': params, 'inputs': list(inputs)})
+        return key, value
@@ -0,0 +1,274 @@
+import json
+import re
+import sqlite3
+
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from config.config import PATHS
+from analysis.av_entropy import EntropyAnalyzer
+
+
+# File name patterns of the indexed files: (kind, folder key, regex)
+_FILE_KINDS = (
+    ('graph', 'graphs', re.compile(r"graph_data_N(\d+)s(\d+)(.*)\.json$")),
+    ('robustness', 'simulation', re.compile(r"robustness_N(\d+)s(\d+)(.*)\.json$")),
+)
+
+# Filterable columns of ``DataIndex.query`` and the accepted operators
+_SUMMARY_FIELDS = ('num_nodes', 'max_cycle_size', 'diameter', 'num_cycles', 'avg_entropy', 'bandwidth')
+_PATTERN_FIELDS = ('N', 's', 'sufix', 'idx') + _SUMMARY_FIELDS
+_OPERATORS = {'eq': '=', 'ne': '!=', 'lt': '<', 'le': '<=', 'gt': '>', 'ge': '>='}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, kind TEXT, N INTEGER, s INTEGER, sufix TEXT,
+    mtime_ns INTEGER, size INTEGER, num_entries INTEGER, summary TEXT
+);
+CREATE TABLE IF NOT EXISTS patterns (
+    path TEXT, idx INTEGER, N INTEGER, s INTEGER, sufix TEXT,
+    num_nodes INTEGER, max_cycle_size INTEGER, diameter INTEGER, num_cycles INTEGER,
+    avg_entropy REAL, bandwidth REAL, offset INTEGER, length INTEGER,
+    PRIMARY KEY (path, idx)
+);
+CREATE INDEX IF NOT EXISTS patterns_Ns ON patterns (N, s);
+"""
+
+
+class PatternHandle(NamedTuple):
+    """Location of one pattern graph inside a graph file."""
+    path: str
+    idx: int
+    offset: int
+    length: int
+
+    def load(self) -> Dict[str, Any]:
+        """Read and parse only this pattern from the file."""
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            return json.loads(f.read(self.length))
+
+
+def _json_array_items(text: str) -> Iterator[Tuple[Any, int, int]]:
+    """Yield ``(value, offset, length)`` for every element of a top-level JSON array."""
+    decoder = json.JSONDecoder()
+    ws = re.compile(r"[\s,]*")
+    pos = ws.match(text, 0).end()
+    if text[pos:pos + 1] != '[':
+        raise ValueError("Expected a JSON array.")
+    pos = ws.match(text, pos + 1).end()
+    while pos < len(text) and text[pos] != ']':
+        value, end = decoder.raw_decode(text, pos)
+        yield value, pos, end - pos
+        pos = ws.match(text, end).end()
+
+
+def pattern_summary(pattern_graph: Dict[str, Any], N: int) -> Dict[str, Any]:
+    """
+    Summary fields of one pattern graph: number of nodes, 'max_cycle_size'
+    and 'diameter' (if ``CycleAnalyzer`` ran), number of cycles, and the
+    average entropy and bandwidth per node of ``EntropyAnalyzer``. Missing
+    fields are ``None``.
+    """
+    nodes = [v for v in pattern_graph.values() if isinstance(v, dict)]
+    cycles = {v['cycle'] for v in nodes if 'cycle' in v}
+    entropy = None
+    if nodes and all('input freq' in v for v in nodes):
+        entropy = EntropyAnalyzer().calculate_average_entropy_per_node(pattern_graph, N)
+    bandwidth = None
+    if all('neigh' in v for v in nodes):
+        bandwidth = EntropyAnalyzer().calculate_average_info_per_node(pattern_graph, N)
+    return {
+        'num_nodes': len(nodes),
+        'max_cycle_size': pattern_graph.get('max_cycle_size'),
+        'diameter': pattern_graph.get('diameter'),
+        'num_cycles': len(cycles - {-1}) if cycles else None,
+        'avg_entropy': None if entropy is None else float(entropy),
+        'bandwidth': bandwidth,
+    }
+
+
+class DataIndex:
+    """
+    SQLite index of the graph and simulation files under ``PATHS``.
+
+    Every ``graph_data_N{N}s{s}{sufix}.json`` contributes one row per pattern
+    with its summary fields (see ``pattern_summary``) and the byte range of
+    the pattern in the file, so matching patterns can be read without parsing
+    the whole file. ``robustness_*.json`` files are listed with a short
+    summary. ``update`` only re-reads files whose size or modification time
+    changed and drops the rows of deleted files.
+
+    Example:
+        >>> index = DataIndex()
+        >>> index.update()
+        >>> for handle in index.query(N=12, s=4, max_cycle_size__ge=6, diameter__le=3):
+        ...     graph = handle.load()
+    """
+
+    def __init__(self, db_path: Optional[Union[str, Path]] = None,
+                 folders: Optional[Dict[str, Path]] = None) -> None:
+        """
+        Open (or create) the index.
+
+        Args:
+            db_path: Database file (default: ``data/index.sqlite`` next to ``PATHS['graphs']``)
+            folders: Folders to scan per ``PATHS`` key (default: ``PATHS``)
+        """
+        self.db_path = Path(db_path) if db_path is not None else PATHS['graphs'].parent / 'index.sqlite'
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.folders = folders
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> 'DataIndex':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+    def _scan(self) -> Iterator[Tuple[str, Path, re.Match]]:
+        folders = self.folders or PATHS
+        for kind, key, regex in _FILE_KINDS:
+            folder = folders.get(key)
+            if folder is None or not Path(folder).is_dir():
+                continue
+            for path in sorted(Path(folder).glob('*.json')):
+                match = regex.match(path.name)
+                if match:
+                    yield kind, path.resolve(), match
+
+    def update(self, verbose: bool = False) -> Dict[str, int]:
+        """
+        Bring the index up to date with the files on disk.
+
+        Returns:
+            Counts of 'added', 'updated', 'unchanged' and 'removed' files
+        """
+        known = {row[0]: (row[1], row[2]) for row in
+                 self.conn.execute("SELECT path, mtime_ns, size FROM files")}
+        counts = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+        seen = set()
+        with self.conn:
+            for kind, path, match in self._scan():
+                key = str(path)
+                seen.add(key)
+                stat = path.stat()
+                if known.get(key) == (stat.st_mtime_ns, stat.st_size):
+                    counts['unchanged'] += 1
+                    continue
+                counts['updated' if key in known else 'added'] += 1
+                if verbose:
+                    print(f"Indexing {path.name}")
+                self._index_file(kind, path, int(match.group(1)), int(match.group(2)),
+                                 match.group(3), stat)
+            for key in set(known) - seen:
+                self._forget(key)
+                counts['removed'] += 1
+        return counts
+
+    def _forget(self, key: str) -> None:
+        self.conn.execute("DELETE FROM files WHERE path = ?", (key,))
+        self.conn.execute("DELETE FROM patterns WHERE path = ?", (key,))
+
+    def _index_file(self, kind: str, path: Path, N: int, s: int, sufix: str, stat) -> None:
+        key = str(path)
+        self._forget(key)
+        # latin-1 maps bytes to characters one to one, so offsets are byte offsets
+        text = path.read_bytes().decode('latin-1')
+        summary: Dict[str, Any] = {}
+        if kind == 'graph':
+            rows = []
+            for idx, (value, offset, length) in enumerate(_json_array_items(text)):
+                if not isinstance(value, dict):
+                    continue
+                fields = pattern_summary(value, N)
+                rows.append((key, idx, N, s, sufix, *(fields[f] for f in _SUMMARY_FIELDS),
+                             offset, length))
+            self.conn.executemany(
+                f"INSERT INTO patterns VALUES ({', '.join('?' * 13)})", rows)
+            num_entries = len(rows)
+        else:
+            result = json.loads(text)
+            singles = result.get('singles', [])
+            num_entries = len(singles) + len(result.get('pairs', []))
+            if singles:
+                summary['min_recovery_fraction'] = min(r['recovery_fraction'] for r in singles)
+        self.conn.execute("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                          (key, kind, N, s, sufix, stat.st_mtime_ns, stat.st_size, num_entries,
+                           json.dumps(summary)))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _where(filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        for name, value in filters.items():
+            field, _, op = name.partition('__')
+            op = op or 'eq'
+            if field not in _PATTERN_FIELDS or op not in _OPERATORS:
+                raise ValueError(f"Unknown filter `{name}`; fields are {_PATTERN_FIELDS}, "
+                                 f"operators {tuple(_OPERATORS)}.")
+            clauses.append(f"{field} {_OPERATORS[op]} ?")
+            params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, order_by: Optional[str] = None, limit: Optional[int] = None,
+              **filters: Any) -> List[PatternHandle]:
+        """
+        Patterns matching all *filters*, as handles to their place in the files.
+
+        Filters are ``field=value`` or ``field__op=value`` with ``op`` one of
+        eq, ne, lt, le, gt, ge and ``field`` one of N, s, sufix, idx,
+        num_nodes, max_cycle_size, diameter, num_cycles, avg_entropy,
+        bandwidth. Fields that were not available (e.g. cycles before
+        ``CycleAnalyzer`` ran) are NULL and never match a comparison.
+        """
+        where, params = self._where(filters)
+        sql = "SELECT path, idx, offset, length FROM patterns" + where
+        if order_by is not None:
+            desc = order_by.startswith('-')
+            field = order_by.lstrip('-')
+            if field not in _PATTERN_FIELDS:
+                raise ValueError(f"Cannot order by `{order_by}`.")
+            sql += f" ORDER BY {field}{' DESC' if desc else ''}"
+        else:
+            sql += " ORDER BY path, idx"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return [PatternHandle(*row) for row in self.conn.execute(sql, params)]
+
+    def summaries(self, **filters: Any) -> List[Dict[str, Any]]:
+        """Summary rows (all indexed fields plus 'path') of the matching patterns."""
+        where, params = self._where(filters)
+        cursor = self.conn.execute("SELECT * FROM patterns" + where + " ORDER BY path, idx", params)
+        names = [d[0] for d in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+    def files(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Indexed files (optionally of one kind: 'graph' or 'robustness')."""
+        sql, params = "SELECT path, kind, N, s, sufix, num_entries, summary FROM files", []
+        if kind is not None:
+            sql += " WHERE kind = ?"
+            params.append(kind)
+        rows = self.conn.execute(sql + " ORDER BY path", params)
+        return [{'path': p, 'kind': k, 'N': N, 's': s, 'sufix': x, 'num_entries': e,
+                 'summary': json.loads(m)} for p, k, N, s, x, e, m in rows]
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Update the SQLite index of the graph and simulation files.")
+    parser.add_argument('--db', type=Path, default=None, help="Database file")
+    args = parser.parse_args()
+
+    with DataIndex(args.db) as index:
+        print(index.update(verbose=True))
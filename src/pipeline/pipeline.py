@@ -0,0 +1,267 @@
+import json
+import numpy as np
+
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from config.config import PATHS
+from patterns.alternations import PatternGenerator
+from patterns.weighted_alternations import WeightedPatternGenerator
+from graphs.graph_creator import StrategyGraphBuilder
+from graphs.cycle_analyzer import CycleAnalyzer
+from analysis.av_entropy import EntropyAnalyzer
+from pipeline.artifacts import ArtifactStore
+
+
+class Pipeline:
+    """
+    In-memory chain of the generation stages: patterns -> strategy graphs ->
+    cycles -> entropy metrics.
+
+    Each stage is a generator consuming the previous one, so a pattern is
+    fully processed before the next one is drawn and nothing is written to
+    disk unless ``run(save=True)`` is requested. Since patterns and strategies
+    are drawn in interleaved order, results for a given seed differ from the
+    file-based notebook workflow.
+
+    Example:
+        >>> gen = PatternGenerator(N=9, step=3, num_patterns=10, permute_columns=True, rng=rng)
+        >>> result = Pipeline(gen, rng=rng).run()
+        >>> result['graphs'][0]['diameter']
+    """
+
+    def __init__(self, generator: Union[PatternGenerator, WeightedPatternGenerator],
+                 rng: Optional[np.random.Generator] = None,
+                 shuffle: bool = True,
+                 verbose: bool = False) -> None:
+        """
+        Initialize the pipeline.
+        
+        Args:
+            generator: Pattern generator; ``generate()`` is called ``num_patterns`` times
+            rng: RNG for the strategy search (default: the generator's RNG)
+            shuffle: Whether to shuffle candidate neighbour sets in the search
+            verbose: If True, print the metrics of each pattern
+        """
+        self.generator = generator
+        self.rng = rng if rng is not None else generator.rng
+        self.shuffle = shuffle
+        self.verbose = verbose
+        self._builder: Optional[StrategyGraphBuilder] = None
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+    def patterns(self) -> Iterator[Dict[str, List[str]]]:
+        """Yield ``num_patterns`` freshly generated patterns."""
+        for _ in range(self.generator.num_patterns):
+            yield self.generator.generate()
+
+    def graphs(self, patterns: Iterable[Dict[str, List[str]]]) -> Iterator[Dict[str, Dict[str, object]]]:
+        """Infer the strategy graph of each pattern."""
+        for pat in patterns:
+            if self._builder is None:
+                self._builder = StrategyGraphBuilder(self.rng, patterns=[pat])
+            yield self._builder.build_graph(pat, shuffle=self.shuffle)
+
+    def cycles(self, graphs: Iterable[Dict[str, Dict[str, object]]]) -> Iterator[Dict[str, Dict[str, object]]]:
+        """Add cycle information to each graph, as ``CycleAnalyzer.process`` does."""
+        for graph in graphs:
+            CycleAnalyzer.augment_pattern(graph)
+            yield graph
+
+    def metrics(self, graphs: Iterable[Dict[str, Dict[str, object]]]) -> Iterator[Dict[str, object]]:
+        """Compute the average information and entropy per node of each graph."""
+        ea = EntropyAnalyzer()
+        for idx, graph in enumerate(graphs):
+            n = sum(1 for node in graph.values() if isinstance(node, dict))
+            record = {
+                'graph': graph,
+                'info': ea.calculate_average_info_per_node(graph, n),
+                'entropy': float(ea.calculate_average_entropy_per_node(graph, n)),
+            }
+            if self.verbose:
+                print(f"Pattern {idx}: bandwidth {record['info']:.2f}, entropy {record['entropy']:.2f}, "
+                      f"max cycle {graph['max_cycle_size']}, diameter {graph['diameter']}")
+            yield record
+
+    def stream(self) -> Iterator[Dict[str, object]]:
+        """Run all stages lazily, yielding one record per pattern."""
+        return self.metrics(self.cycles(self.graphs(self.patterns())))
+
+    # ------------------------------------------------------------------
+    # Collection and persistence
+    # ------------------------------------------------------------------
+    def run(self, save: bool = False, sufix: str = '') -> Dict[str, list]:
+        """
+        Run the pipeline and collect its outputs.
+        
+        Args:
+            save: If True, write the patterns and the augmented graphs to
+                ``PATHS['patterns']`` and ``PATHS['graphs']``
+            sufix: Suffix for the output file names, so concurrent runs can
+                use distinct files
+            
+        Returns:
+            Dictionary with 'patterns', 'graphs', 'info' and 'entropy' lists
+        """
+        result: Dict[str, list] = {'patterns': [], 'graphs': [], 'info': [], 'entropy': []}
+        for record in self.stream():
+            graph = record['graph']
+            result['patterns'].append({i: node['pattern'] for i, node in graph.items()
+                                       if isinstance(node, dict)})
+            result['graphs'].append(graph)
+            result['info'].append(record['info'])
+            result['entropy'].append(record['entropy'])
+
+        if save:
+            self.save(result, sufix)
+        return result
+
+    @staticmethod
+    def save(result: Dict[str, list], sufix: str = '') -> Dict[str, Path]:
+        """
+        Write the patterns and graphs of a pipeline result to the usual locations.
+        
+        Returns:
+            Dictionary with the 'patterns' and 'graphs' file paths
+
+        Raises:
+            ValueError: If the result has no patterns (N and s, which name the
+                graph file, are read from the first one)
+        """
+        if not result['patterns']:
+            raise ValueError("Nothing to save: the pipeline result has no patterns.")
+        first = result['patterns'][0]
+        N = len(first)
+        s = sum(int(col[0]) for col in first.values())
+        paths = {
+            'patterns': PATHS['patterns'] / f"patterns{sufix}.json",
+            'graphs': PATHS['graphs'] / f"graph_data_N{N:d}s{s:d}{sufix}.json",
+        }
+        for key, path in paths.items():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(result[key], f)
+        return paths
+
+
+class CachedPipeline:
+    """
+    Stage-level cached version of ``Pipeline`` backed by an ``ArtifactStore``.
+
+    Every stage gets its own RNG and is keyed on its parameters plus the keys
+    of its inputs:
+
+        - patterns: generator configuration and ``seed``
+        - graphs: patterns key, ``shuffle``, builder seed and builder version
+        - cycles: graphs key and ``CycleAnalyzer.VERSION``
+        - metrics: cycles key and ``EntropyAnalyzer.VERSION``
+
+    A stage whose key is already in the store is loaded instead of computed,
+    so e.g. bumping ``CycleAnalyzer.VERSION`` recomputes cycles and metrics
+    but reuses the patterns and inferred strategies.
+
+    Example:
+        >>> config = {'N': 9, 'step': 3, 'num_patterns': 10, 'permute_columns': True}
+        >>> result = CachedPipeline(config, seed=42).run()
+    """
+
+    def __init__(self, config: Dict[str, object], seed: int,
+                 store: Optional[ArtifactStore] = None,
+                 shuffle: bool = True,
+                 builder_seed: Optional[int] = None) -> None:
+        """
+        Initialize the cached pipeline.
+        
+        Args:
+            config: Keyword arguments of ``PatternGenerator`` (or of
+                ``WeightedPatternGenerator`` if it contains ``procs``), without ``rng``
+            seed: Seed of the pattern generator RNG
+            store: Artifact store (default: ``ArtifactStore()``)
+            shuffle: Whether to shuffle candidate neighbour sets in the search
+            builder_seed: Seed of the strategy search RNG (default: ``seed``)
+        """
+        self.config = dict(config)
+        self.seed = seed
+        self.store = store if store is not None else ArtifactStore()
+        self.shuffle = shuffle
+        self.builder_seed = seed if builder_seed is None else builder_seed
+        self.keys: Dict[str, str] = {}
+        self.values: Dict[str, object] = {}
+
+    def _generator(self) -> Union[PatternGenerator, WeightedPatternGenerator]:
+        rng = np.random.default_rng(self.seed)
+        if 'procs' in self.config:
+            return WeightedPatternGenerator(rng=rng, **self.config)
+        return PatternGenerator(rng=rng, **self.config)
+
+    def patterns(self) -> List[Dict[str, List[str]]]:
+        generator_type = 'weighted' if 'procs' in self.config else 'uniform'
+        params = {'generator': generator_type, 'config': self.config, 'seed': self.seed}
+        self.keys['patterns'], pats = self.store.cached(
+            'patterns', params, [], lambda: self._generator().generate_many())
+        self.values['patterns'] = pats
+        return pats
+
+    def graphs(self) -> List[Dict[str, Dict[str, object]]]:
+        pats = self.patterns()
+        params = {'shuffle': self.shuffle, 'seed': self.builder_seed,
+                  'version': StrategyGraphBuilder.VERSION}
+
+        def compute():
+            builder = StrategyGraphBuilder(np.random.default_rng(self.builder_seed), patterns=pats)
+            return builder.build_graphs(shuffle=self.shuffle, save=False)
+
+        self.keys['graphs'], graphs = self.store.cached(
+            'graphs', params, [self.keys['patterns']], compute)
+        self.values['graphs'] = graphs
+        return graphs
+
+    def cycles(self) -> List[Dict[str, Dict[str, object]]]:
+        graphs = self.graphs()
+
+        def compute():
+            # Augment a copy so the graphs artifact held in memory stays untouched
+            struct = json.loads(json.dumps(graphs))
+            for graph in struct:
+                CycleAnalyzer.augment_pattern(graph)
+            return struct
+
+        self.keys['cycles'], struct = self.store.cached(
+            'cycles', {'version': CycleAnalyzer.VERSION}, [self.keys['graphs']], compute)
+        self.values['cycles'] = struct
+        return struct
+
+    def metrics(self) -> Dict[str, List[float]]:
+        struct = self.cycles()
+
+        def compute():
+            ea = EntropyAnalyzer()
+            info, entropy = [], []
+            for graph in struct:
+                n = sum(1 for node in graph.values() if isinstance(node, dict))
+                info.append(ea.calculate_average_info_per_node(graph, n))
+                entropy.append(float(ea.calculate_average_entropy_per_node(graph, n)))
+            return {'info': info, 'entropy': entropy}
+
+        self.keys['metrics'], metrics = self.store.cached(
+            'metrics', {'version': EntropyAnalyzer.VERSION}, [self.keys['cycles']], compute)
+        return metrics
+
+    def run(self) -> Dict[str, object]:
+        """
+        Run (or load) all stages.
+        
+        Returns:
+            Dictionary with 'patterns', 'graphs' (with cycle information),
+            'info', 'entropy' and the artifact 'keys' of every stage
+        """
+        metrics = self.metrics()
+        return {
+            'patterns': self.values['patterns'],
+            'graphs': self.values['cycles'],
+            'info': metrics['info'],
+            'entropy': metrics['entropy'],
+            'keys': dict(self.keys),
+        }